@@ -0,0 +1,401 @@
+import argparse
+import mmap
+import struct
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Generator, Sequence
+
+from tic_tac_toe.boards import create_game_board
+from tic_tac_toe.lines import get_line_table
+from tic_tac_toe.model import TicTacToeGame, GameBoard, Player, Symbol, SYMBOL_INDEX
+from tic_tac_toe.records import GameRecord, GameRecordWriter, HEADER, MAGIC, VERSION, decode_varint
+from tic_tac_toe.zobrist import zobrist_keys
+
+# An archive is a plain game record file (tic_tac_toe.records) plus sidecar files next to it:
+#   .idx    SIDECAR_HEADER then one ENTRY per game in file order, the game id is the entry number
+#   .ckpt   SIDECAR_HEADER then checkpoints, games longer than CHECKPOINT_INTERVAL get one every CHECKPOINT_INTERVAL
+#           plies: CHECKPOINT_HEADER (ply, stones hash), the game's line counters per Symbol as u16, then the stones
+#           as one little endian bit mask (bit x * size + y) of stone_bytes(size) bytes per Symbol
+#   .sizes  SIZES_HEADER, one SIZE_ENTRY per board size, then the u32 game ids of every size back to back
+# The .sizes file is rewritten when a writer closes, readers fall back to scanning .idx when it is out of date.
+INDEX_MAGIC = b'TTTI'
+CHECKPOINT_MAGIC = b'TTTC'
+SIZES_MAGIC = b'TTTS'
+SIDECAR_HEADER = struct.Struct('<4sB3x')
+ENTRY = struct.Struct('<QIHQH')  # body offset, body length, board size, checkpoint offset, checkpoint count
+CHECKPOINT_HEADER = struct.Struct('<IQ')
+SIZES_HEADER = struct.Struct('<4sB3xII')  # magic, version, games indexed, sizes
+SIZE_ENTRY = struct.Struct('<III')  # board size, position of the first id, id count
+CHECKPOINT_INTERVAL = 256
+CHECKPOINT_VERSION = 2  # 1 had no stones
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(path.name + '.idx')
+
+
+def checkpoint_path(path: Path) -> Path:
+    return path.with_name(path.name + '.ckpt')
+
+
+def sizes_path(path: Path) -> Path:
+    return path.with_name(path.name + '.sizes')
+
+
+def checkpoint_format(size: int) -> struct.Struct:
+    return struct.Struct(f'<{len(get_line_table(size)) * len(Symbol)}H')
+
+
+def stone_bytes(size: int) -> int:
+    return (size * size + 7) // 8
+
+
+def checkpoint_stride(size: int) -> int:
+    return CHECKPOINT_HEADER.size + checkpoint_format(size).size + len(Symbol) * stone_bytes(size)
+
+
+def compute_checkpoints(record: GameRecord) -> list[bytes]:
+    '''
+    Line counters, stones hash and stones after every CHECKPOINT_INTERVAL plies, skipping the end of the game since
+    TicTacToeGame.restore can only restore unfinished games
+    '''
+    size = record.size
+    table = get_line_table(size)
+    keys = zobrist_keys(size)
+    counts = {symbol: [0] * len(table) for symbol in Symbol}
+    counts_format = checkpoint_format(size)
+    stones = {symbol: bytearray(stone_bytes(size)) for symbol in Symbol}
+    n_players = len(record.players)
+    stones_hash = 0
+    checkpoints = []
+    for ply, position in enumerate(record.moves[:-1], 1):
+        symbol = record.players[(ply - 1) % n_players][1]
+        for line_idx in table.cell_lines[position]:
+            counts[symbol][line_idx] += 1
+        cell = position[0] * size + position[1]
+        stones_hash ^= keys[SYMBOL_INDEX[symbol]][cell]
+        stones[symbol][cell >> 3] |= 1 << (cell & 7)
+        if ply % CHECKPOINT_INTERVAL == 0:
+            values = [c for symbol in Symbol for c in counts[symbol]]
+            checkpoints.append(CHECKPOINT_HEADER.pack(ply, stones_hash) + counts_format.pack(*values)
+                               + b''.join(stones[symbol] for symbol in Symbol))
+    return checkpoints
+
+
+def open_sidecar(path: Path, magic: bytes, version: int = VERSION) -> BinaryIO:
+    '''
+    :return: The sidecar opened for appending, with its header written when it is new
+    '''
+    new_file = not path.exists() or path.stat().st_size == 0
+    if not new_file:
+        with open(path, 'rb') as f:
+            check_header(f.read(SIDECAR_HEADER.size), magic, path, version)
+    f = open(path, 'ab')
+    if new_file:
+        f.write(SIDECAR_HEADER.pack(magic, version))
+        f.flush()
+    return f
+
+
+def check_header(header: bytes, magic: bytes, path: Path, version: int = VERSION):
+    if len(header) < SIDECAR_HEADER.size or SIDECAR_HEADER.unpack_from(header) != (magic, version):
+        raise ValueError(f'{path} is not a version {version} {magic.decode()} file, rebuild the archive with --index')
+
+
+def sidecars_current(path: Path) -> bool:
+    '''
+    :return: Whether the archive has its index and checkpoints in the current format
+    '''
+    for sidecar, magic, version in ((index_path(path), INDEX_MAGIC, VERSION),
+                                    (checkpoint_path(path), CHECKPOINT_MAGIC, CHECKPOINT_VERSION)):
+        if not sidecar.exists():
+            return False
+        with open(sidecar, 'rb') as f:
+            try:
+                check_header(f.read(SIDECAR_HEADER.size), magic, sidecar, version)
+            except ValueError:
+                return False
+    return True
+
+
+def map_file(path: Path, magic: bytes, version: int = VERSION) -> tuple[BinaryIO, mmap.mmap]:
+    f = open(path, 'rb')
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # Empty files can not be mapped
+        f.close()
+        raise ValueError(f'{path} is empty')
+    try:
+        check_header(mapped[:SIDECAR_HEADER.size], magic, path, version)
+    except ValueError:
+        mapped.close()
+        f.close()
+        raise
+    return f, mapped
+
+
+def build_size_index(entries: bytes | mmap.mmap) -> dict[int, array]:
+    '''
+    :param entries: Contents of a .idx file
+    :return: Game ids per board size, in game id order
+    '''
+    by_size: dict[int, array] = {}
+    entries = memoryview(entries)[SIDECAR_HEADER.size:]
+    entries = entries[:len(entries) - len(entries) % ENTRY.size]
+    for game_id, (_, _, size, _, _) in enumerate(ENTRY.iter_unpack(entries)):
+        by_size.setdefault(size, array('I')).append(game_id)
+    return by_size
+
+
+def write_size_index(path: Path):
+    with open(index_path(path), 'rb') as f:
+        entries = f.read()
+    check_header(entries, INDEX_MAGIC, index_path(path))
+    by_size = build_size_index(entries)
+    n_games = (len(entries) - SIDECAR_HEADER.size) // ENTRY.size
+    with open(sizes_path(path), 'wb') as f:
+        f.write(SIZES_HEADER.pack(SIZES_MAGIC, VERSION, n_games, len(by_size)))
+        first = 0
+        for size in sorted(by_size):
+            f.write(SIZE_ENTRY.pack(size, first, len(by_size[size])))
+            first += len(by_size[size])
+        for size in sorted(by_size):
+            f.write(struct.pack(f'<{len(by_size[size])}I', *by_size[size]))
+
+
+def append_entry(index_file: BinaryIO, checkpoint_file: BinaryIO, record: GameRecord, offset: int, length: int):
+    checkpoint_offset = checkpoint_file.tell()
+    checkpoints = compute_checkpoints(record)
+    checkpoint_file.write(b''.join(checkpoints))
+    checkpoint_file.flush()
+    index_file.write(ENTRY.pack(offset, length, record.size, checkpoint_offset, len(checkpoints)))
+    index_file.flush()
+
+
+def index_archive(path: Path | str):
+    '''
+    Build the sidecars for a record file written without them, like the logs the view models write
+    '''
+    path = Path(path)
+    for sidecar in (index_path(path), checkpoint_path(path)):
+        sidecar.unlink(missing_ok=True)
+    index_file = open_sidecar(index_path(path), INDEX_MAGIC)
+    checkpoint_file = open_sidecar(checkpoint_path(path), CHECKPOINT_MAGIC, CHECKPOINT_VERSION)
+    f, data = map_file(path, MAGIC)
+    try:
+        offset = HEADER.size
+        while offset < len(data):
+            length, offset = decode_varint(data, offset)
+            record = GameRecord.decode(data[offset:offset + length])
+            append_entry(index_file, checkpoint_file, record, offset, length)
+            offset += length
+    finally:
+        data.close()
+        f.close()
+        checkpoint_file.close()
+        index_file.close()
+    write_size_index(path)
+
+
+class GameArchiveWriter:
+    '''
+    Appends games to an archive, can be handed to the view models in place of a GameRecordWriter. A plain record
+    file is indexed first so it can be extended into an archive, so is an archive with sidecars in an older format.
+    '''
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        if self.path.exists() and self.path.stat().st_size > HEADER.size and not sidecars_current(self.path):
+            index_archive(self.path)
+        self.records = GameRecordWriter(self.path)
+        self.index_file = open_sidecar(index_path(self.path), INDEX_MAGIC)
+        self.checkpoint_file = open_sidecar(checkpoint_path(self.path), CHECKPOINT_MAGIC, CHECKPOINT_VERSION)
+        self.n_games = (self.index_file.tell() - SIDECAR_HEADER.size) // ENTRY.size
+
+    def write(self, record: GameRecord) -> int:
+        '''
+        :return: The game id
+        '''
+        offset, length = self.records.write(record)
+        append_entry(self.index_file, self.checkpoint_file, record, offset, length)
+        self.n_games += 1
+        return self.n_games - 1
+
+    def write_game(self, game: TicTacToeGame) -> int:
+        return self.write(GameRecord.from_game(game))
+
+    def close(self):
+        self.records.close()
+        self.checkpoint_file.close()
+        self.index_file.close()
+        write_size_index(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class GameArchive:
+    '''
+    Read only, memory mapped view of an archive. Records are decoded straight out of the mapping, nothing is read
+    until a game is asked for.
+    '''
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.files = []
+        self.maps = []
+        try:
+            self.data = self.map(self.path, MAGIC)
+            self.index = self.map(index_path(self.path), INDEX_MAGIC)
+            self.checkpoints = self.map(checkpoint_path(self.path), CHECKPOINT_MAGIC, CHECKPOINT_VERSION)
+            self.n_games = (len(self.index) - SIDECAR_HEADER.size) // ENTRY.size
+            self.size_ids = self.load_size_index()
+        except Exception:
+            self.close()
+            raise
+
+    def map(self, path: Path, magic: bytes, version: int = VERSION) -> mmap.mmap:
+        f, mapped = map_file(path, magic, version)
+        self.files.append(f)
+        self.maps.append(mapped)
+        return mapped
+
+    def load_size_index(self) -> dict[int, Sequence[int]]:
+        path = sizes_path(self.path)
+        if path.exists() and path.stat().st_size >= SIZES_HEADER.size:
+            sizes = self.map(path, SIZES_MAGIC)
+            _, _, n_games, n_sizes = SIZES_HEADER.unpack_from(sizes)
+            if n_games == self.n_games:
+                ids = memoryview(sizes)[SIZES_HEADER.size + n_sizes * SIZE_ENTRY.size:]
+                size_ids = {}
+                for i in range(n_sizes):
+                    size, first, count = SIZE_ENTRY.unpack_from(sizes, SIZES_HEADER.size + i * SIZE_ENTRY.size)
+                    # Zero copy view of the ids, they are little endian like the hosts we run on
+                    size_ids[size] = ids[first * 4:(first + count) * 4].cast('I')
+                return size_ids
+        # Missing or out of date, a writer is still open or did not close cleanly
+        return build_size_index(self.index)
+
+    def close(self):
+        self.size_ids = {}
+        for mapped in self.maps:
+            try:
+                mapped.close()
+            except BufferError:  # A caller still holds a view of it, the mapping goes when that is released
+                pass
+        for f in self.files:
+            f.close()
+        self.maps = []
+        self.files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.n_games
+
+    def entry(self, game_id: int) -> tuple[int, int, int, int, int]:
+        if not 0 <= game_id < self.n_games:
+            raise IndexError(f'There is no game {game_id} in the archive')
+        return ENTRY.unpack_from(self.index, SIDECAR_HEADER.size + game_id * ENTRY.size)
+
+    def raw(self, game_id: int) -> memoryview:
+        '''
+        :return: The encoded record body, a slice of the mapping
+        '''
+        offset, length, _, _, _ = self.entry(game_id)
+        return memoryview(self.data)[offset:offset + length]
+
+    def record(self, game_id: int) -> GameRecord:
+        return GameRecord.decode(self.raw(game_id))
+
+    def __getitem__(self, game_id: int) -> GameRecord:
+        return self.record(game_id)
+
+    def __iter__(self) -> Generator[GameRecord, None, None]:
+        for game_id in range(self.n_games):
+            yield self.record(game_id)
+
+    def sizes(self) -> list[int]:
+        return sorted(self.size_ids)
+
+    def games_of_size(self, size: int) -> Sequence[int]:
+        return self.size_ids.get(size, ())
+
+    def checkpoint(self, size: int, offset: int, n: int) -> tuple[int, dict[Symbol, list[int]], int, dict[Symbol, int]]:
+        '''
+        :return: (ply, line counters per Symbol, stones hash, stone bit mask per Symbol) of the game's n-th checkpoint
+        '''
+        counts_format = checkpoint_format(size)
+        offset += n * checkpoint_stride(size)
+        ply, stones_hash = CHECKPOINT_HEADER.unpack_from(self.checkpoints, offset)
+        offset += CHECKPOINT_HEADER.size
+        values = counts_format.unpack_from(self.checkpoints, offset)
+        offset += counts_format.size
+        n_lines = len(get_line_table(size))
+        line_counts = {symbol: list(values[i * n_lines:(i + 1) * n_lines]) for i, symbol in enumerate(Symbol)}
+        n_bytes = stone_bytes(size)
+        stones = {}
+        for i, symbol in enumerate(Symbol):
+            start = offset + i * n_bytes
+            stones[symbol] = int.from_bytes(self.checkpoints[start:start + n_bytes], 'little')
+        return ply, line_counts, stones_hash, stones
+
+    def game_at(self, game_id: int, ply: int | None = None, board: GameBoard | None = None) -> TicTacToeGame:
+        '''
+        Rebuild a game as it stood after ply moves. The board is loaded from the last checkpoint at or before ply and
+        only the moves after it are played.
+
+        :param ply: None for the end of the game
+        :param board: Board to play on, defaults to the best backend for the size
+        '''
+        if ply is not None and ply < 0:
+            raise IndexError(f'Game {game_id} has no move {ply}')
+        # Moves past ply are not needed, long games are only decoded as far as asked
+        record = GameRecord.decode(self.raw(game_id), max_moves=None if ply is None else ply + 1)
+        _, _, size, checkpoint_offset, n_checkpoints = self.entry(game_id)
+        plies = len(record.moves) if ply is None else ply
+        if not 0 <= plies <= len(record.moves):
+            raise IndexError(f'Game {game_id} only has {len(record.moves)} moves')
+        game = TicTacToeGame(board if board is not None else create_game_board(size))
+        game.initialize()
+        game.set_players([Player(name, symbol) for name, symbol in record.players])
+        start = 0
+        n = min(plies // CHECKPOINT_INTERVAL, n_checkpoints)
+        if n:
+            start, line_counts, stones_hash, stones = self.checkpoint(size, checkpoint_offset, n - 1)
+            game.restore(record.moves[:start], line_counts, stones_hash, stones)
+        for position in record.moves[start:plies]:
+            game.register_turn(position)
+        return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or index a game archive')
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--index', action='store_true', help='Build the sidecar files for a plain record file')
+    parser.add_argument('--game', type=int, default=None, help='Print this game')
+    parser.add_argument('--ply', type=int, default=None, help='Print the game after this many moves')
+    args = parser.parse_args()
+    if args.index:
+        index_archive(args.path)
+    with GameArchive(args.path) as archive:
+        if args.game is None:
+            for size in archive.sizes():
+                print(f'{size}x{size}: {len(archive.games_of_size(size))} games')
+            return
+        game = archive.game_at(args.game, args.ply)
+        record = archive.record(args.game)
+        print(record)
+        for row_idx in range(game.board.board_size):
+            print(' '.join('.' if c[row_idx] is None else c[row_idx].value for c in game.board.game_board))
+        if game.is_game_over():
+            print('Draw' if game.winner is None else f'{game.winner.name} won')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import random
+import timeit
+
+from tic_tac_toe.model import GameBoard, TicTacToeGame, Player, Symbol
+from tic_tac_toe.boards import BACKENDS
+
+SIZES = (3, 10, 50, 100)
+
+
+def fill_without_win(board: GameBoard, fraction: float, seed: int = 0):
+    '''
+    Fill a fraction of the board while leaving one column empty, so no line is won and every
+    evaluate_game_state call has to look at the whole board.
+    '''
+    size = board.board_size
+    rng = random.Random(seed)
+    cells = [(x, y) for x in range(size - 1) for y in range(size)]
+    rng.shuffle(cells)
+    symbols = list(Symbol)
+    for i, position in enumerate(cells[:int(len(cells) * fraction)]):
+        board[position] = symbols[i % len(symbols)]
+
+
+def time_evaluate(backend: type[GameBoard], size: int, number: int) -> float:
+    '''
+    :return: seconds per evaluate_game_state call
+    '''
+    game = TicTacToeGame(backend(size))
+    game.initialize()
+    fill_without_win(game.board, 0.5)
+    return timeit.timeit(game.evaluate_game_state, number=number) / number
+
+
+def time_random_games(backend: type[GameBoard], size: int, orders: list[list[tuple[int, int]]],
+                      repeat: int = 3) -> float:
+    '''
+    Whole games through register_turn, the way the interfaces use a board, best of repeat
+
+    :return: seconds per game
+    '''
+    best = None
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        for order in orders:
+            game = TicTacToeGame(backend(size))
+            game.initialize()
+            game.set_players([Player('a', Symbol.X), Player('b', Symbol.O)])
+            for position in order:
+                game.register_turn(position)
+                if game.is_game_over():
+                    break
+        elapsed = (timeit.default_timer() - start) / len(orders)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(sizes=SIZES, number: int = 200, moves: int = 20000) -> dict[str, dict[int, dict[str, float]]]:
+    '''
+    :param moves: Roughly how many moves of random games to time per size and backend
+    :return: {'evaluate': results, 'random_game': results}, results map size to seconds per call for each backend
+    '''
+    results = {'evaluate': {}, 'random_game': {}}
+    for size in sizes:
+        rng = random.Random(size)
+        orders = []
+        for _ in range(max(3, moves // (size * size))):
+            order = [(x, y) for x in range(size) for y in range(size)]
+            rng.shuffle(order)
+            orders.append(order)
+        results['evaluate'][size] = {name: time_evaluate(backend, size, number) for name, backend in BACKENDS.items()}
+        results['random_game'][size] = {name: time_random_games(backend, size, orders)
+                                        for name, backend in BACKENDS.items()}
+    return results
+
+
+def crossover(results: dict[int, dict[str, float]], backend: str, baseline: str = 'list') -> int | None:
+    '''
+    :return: The smallest benchmarked size from which backend stays faster than baseline
+    '''
+    found = None
+    for size in sorted(results, reverse=True):
+        if results[size][backend] < results[size][baseline]:
+            found = size
+        else:
+            break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time evaluate_game_state and whole games for each GameBoard backend')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--moves', type=int, default=20000)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.number, args.moves)
+    names = list(BACKENDS)
+    for benchmark, timings_by_size in results.items():
+        print(benchmark)
+        print('size'.ljust(6) + ''.join(name.rjust(14) for name in names))
+        for size, timings in timings_by_size.items():
+            print(str(size).ljust(6) + ''.join(f'{timings[name] * 1e6:12.1f}us' for name in names))
+        for name in names[1:]:
+            size = crossover(timings_by_size, name)
+            if size is None:
+                print(f'{name} is not faster than list at the largest size, there is no crossover')
+            else:
+                print(f'{name} is faster than list from size {size}')
+        print()
+    print('tic_tac_toe.boards.create_game_board should follow random_game, that is what playing a game costs')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+
+from tic_tac_toe.engines.parallel_mcts import ParallelMCTSEngine
+from tic_tac_toe.model import TicTacToeGame, GameBoard, Player, Symbol
+
+
+def worker_counts(max_workers: int) -> list[int]:
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def measure(workers: int, size: int, time_limit: float, moves: int) -> float:
+    '''
+    :return: Total playouts per second over all workers, pool start up is excluded
+    '''
+    game = TicTacToeGame(GameBoard(size))
+    game.initialize()
+    game.set_players([Player('a', Symbol.X), Player('b', Symbol.O)])
+    with ParallelMCTSEngine(workers=workers, time_limit=time_limit, seed=0) as engine:
+        playouts = 0
+        elapsed = 0.0
+        for _ in range(moves):
+            engine.choose_move(game)
+            playouts += engine.last_playouts
+            elapsed += engine.last_elapsed
+    return playouts / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Root parallel MCTS playout throughput from 1 to N workers')
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--time-limit', type=float, default=1.0)
+    parser.add_argument('--moves', type=int, default=3)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f'{"workers":>8}{"playouts/s":>14}{"speedup":>10}')
+    for workers in worker_counts(args.max_workers):
+        rate = measure(workers, args.size, args.time_limit, args.moves)
+        baseline = baseline or rate
+        print(f'{workers:>8}{rate:>14.0f}{rate / baseline:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+import argparse
+import gc
+import os
+import resource
+import sys
+from time import perf_counter
+
+# Before PySide6 is imported, the benchmark needs no display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import Signal, Property
+from PySide6.QtGui import QImage, QColor, QMouseEvent, QPaintEvent, QPainter, QPen, Qt
+from PySide6.QtWidgets import QApplication, QWidget, QGridLayout, QSizePolicy, QFrame
+
+from tic_tac_toe.model import Symbol
+from tic_tac_toe.qt_interface.game_screen import WidgetTicTacToe
+
+SIZES = (3, 20, 100)
+WINDOW_SIZE = (1280, 720)
+FRAMES = 200
+
+
+def rss_bytes() -> int:
+    '''
+    :return: Resident memory now where /proc is available, otherwise the peak so far
+    '''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def build_board(size: int) -> QWidget:
+    return WidgetTicTacToe(size, size)
+
+
+class FancyBoardTile(QWidget):
+    '''
+    The tile widget the board used to be made of, as it was, the baseline the board is measured against
+    '''
+    sig_clicked = Signal(QWidget, name='sig_clicked')
+
+    def __init__(self, row: int, column: int):
+        super(FancyBoardTile, self).__init__()
+        self.img: QImage | None = None
+        self.row = row
+        self.column = column
+        self.animation = None
+        self.opacity = 0
+
+    @Property(float)
+    def pix_opacity(self):
+        return self.opacity
+
+    @pix_opacity.setter
+    def pix_opacity(self, opacity: float):
+        self.opacity = opacity
+        self.repaint()
+
+    def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+        super(FancyBoardTile, self).mouseReleaseEvent(event)
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.sig_clicked.emit(self)
+
+
+class TileGridBoard(QFrame):
+    '''
+    The board as it used to be built, a FancyBoardTile per cell in a grid layout, each hooked up to the board, and
+    the grid lines painted between them
+    '''
+    sig_grid_item_clicked = Signal(int, int, name='sig_grid_item_clicked')
+
+    def __init__(self, size: int):
+        super(TileGridBoard, self).__init__()
+        self.lbl_cmplx: list[list[FancyBoardTile]] = []
+        self.m_layout = QGridLayout()
+        for i in range(size):
+            lbls = []
+            self.lbl_cmplx.append(lbls)
+            for j in range(size):
+                lbl = FancyBoardTile(i, j)
+                lbl.sig_clicked.connect(self.fancy_board_tile_clicked)
+                lbl.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+                self.m_layout.addWidget(lbl, i, j)
+                lbls.append(lbl)
+        self.setLayout(self.m_layout)
+        self.m_layout.setContentsMargins(0, 0, 0, 0)
+        self.m_layout.setSpacing(6)
+        self.board_color = QColor(Qt.GlobalColor.black)
+
+    def fancy_board_tile_clicked(self, tile: FancyBoardTile):
+        self.sig_grid_item_clicked.emit(tile.row, tile.column)
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        spacing = self.m_layout.spacing()
+        margins = self.contentsMargins()
+        try:
+            pen = QPen(self.board_color)
+            pen.setWidth(spacing)
+            painter.setPen(pen)
+            for ex_w in self.lbl_cmplx[0][:-1]:
+                x1 = ex_w.x() + ex_w.width() + int(spacing / 2)
+                painter.drawLine(x1, margins.top(), x1, self.height() - margins.bottom())
+            for ex_w in list(x[0] for x in self.lbl_cmplx)[:-1]:
+                y1 = ex_w.y() + ex_w.height() + int(spacing / 2)
+                painter.drawLine(margins.left(), y1, self.width() - margins.right(), y1)
+            for lbls in self.lbl_cmplx:
+                for lbl in lbls:
+                    if lbl.img is not None:
+                        painter.setOpacity(max(0.0, lbl.opacity))
+                        img = lbl.img.scaled(lbl.size(), aspectMode=Qt.AspectRatioMode.KeepAspectRatio)
+                        painter.drawImage(lbl.x() + int((lbl.width() - img.width()) / 2),
+                                          lbl.y() + int((lbl.height() - img.height()) / 2), img)
+        finally:
+            painter.end()
+
+
+def build_tile_grid(size: int) -> QWidget:
+    return TileGridBoard(size)
+
+
+BUILDERS = {
+    'board': build_board,
+    'tile_grid': build_tile_grid,
+}
+
+
+def measure(app: QApplication, build, size: int) -> tuple[float, float, int]:
+    '''
+    :return: (seconds to construct, seconds to lay out and render the first frame, bytes of memory it takes)
+    '''
+    gc.collect()
+    before = rss_bytes()
+    start = perf_counter()
+    widget = build(size)
+    constructed = perf_counter()
+    widget.resize(*WINDOW_SIZE)
+    widget.show()
+    app.processEvents()
+    widget.grab()
+    shown = perf_counter()
+    used = rss_bytes() - before
+    widget.close()
+    widget.deleteLater()
+    app.processEvents()
+    return constructed - start, shown - constructed, used
+
+
+def measure_frames(app: QApplication, size: int, frames: int, dirty: bool) -> float:
+    '''
+    Repaint as one fade in tick would on a half full board, either the whole board or only the tile that changed
+
+    :return: Seconds per frame
+    '''
+    symbol = QImage(64, 64, QImage.Format.Format_ARGB32_Premultiplied)
+    symbol.fill(QColor('#17bebb'))
+    board = WidgetTicTacToe(size, size)
+    for row in range(size):
+        for column in range(size):
+            if (row + column) % 2:
+                tile = board.lbl_cmplx[row][column]
+                tile.img = symbol
+                tile.symbol = Symbol.X
+                tile.opacity = 1.0
+    board.resize(*WINDOW_SIZE)
+    board.show()
+    app.processEvents()
+    rect = board.tile_rect(size // 2, size // 2).toAlignedRect()
+    start = perf_counter()
+    for i in range(frames):
+        board.set_tile_opacity(board.lbl_cmplx[size // 2][size // 2], i / frames)
+        if dirty:
+            board.repaint(rect)
+        else:
+            board.repaint()
+    elapsed = perf_counter() - start
+    board.close()
+    board.deleteLater()
+    app.processEvents()
+    return elapsed / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time building and repainting the Qt game board, runs offscreen')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--builders', nargs='+', choices=list(BUILDERS), default=list(BUILDERS))
+    parser.add_argument('--frames', type=int, default=FRAMES, help='Animation frames to time per size, 0 skips')
+    args = parser.parse_args()
+
+    app = QApplication([])
+    print(f'{"builder":12}{"size":>6}{"construct":>14}{"first frame":>14}{"memory":>12}')
+    for name in args.builders:
+        for size in args.sizes:
+            construct, frame, used = measure(app, BUILDERS[name], size)
+            print(f'{name:12}{size:6}{construct * 1e3:12.2f}ms{frame * 1e3:12.2f}ms{used / 2 ** 20:10.2f}MB')
+
+    if args.frames:
+        print()
+        print(f'{"size":>6}{"whole board":>14}{"dirty tile":>14}')
+        for size in args.sizes:
+            whole = measure_frames(app, size, args.frames, dirty=False)
+            dirty = measure_frames(app, size, args.frames, dirty=True)
+            print(f'{size:6}{whole * 1e3:12.3f}ms{dirty * 1e3:12.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import platform
+import random
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from tic_tac_toe.benchmarks.board_backends import fill_without_win
+from tic_tac_toe.boards import BACKENDS
+from tic_tac_toe.model import GameBoard, TicTacToeGame, Player, Symbol
+
+# Only the model is imported, the suite runs headless without Qt or Textual installed
+SIZES = (3, 5, 10, 20, 50, 100)
+REPEAT = 5
+MIN_RUN_SECONDS = 0.05
+DEFAULT_THRESHOLD = 0.10
+SEED = 0
+
+
+def measure(setup: Callable[[], object], run: Callable[[object], int], repeat: int = REPEAT,
+            min_seconds: float = MIN_RUN_SECONDS) -> float:
+    '''
+    Each repeat keeps calling setup then run, timing only run, until min_seconds were timed. run returns the number
+    of operations it did.
+
+    :return: Seconds per operation of the fastest repeat
+    '''
+    best = None
+    for _ in range(repeat):
+        elapsed = 0.0
+        ops = 0
+        while elapsed < min_seconds:
+            state = setup()
+            start = perf_counter()
+            ops += run(state)
+            elapsed += perf_counter() - start
+        per_op = elapsed / ops
+        best = per_op if best is None else min(best, per_op)
+    return best
+
+
+def new_game(backend: type[GameBoard], size: int) -> TicTacToeGame:
+    game = TicTacToeGame(backend(size))
+    game.initialize()
+    game.set_players([Player('a', Symbol.X), Player('b', Symbol.O)])
+    return game
+
+
+def random_order(size: int, rng: random.Random) -> list[tuple[int, int]]:
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    rng.shuffle(cells)
+    return cells
+
+
+def bench_initialize_game_board(backend: type[GameBoard], size: int) -> float:
+    board = backend(size)
+
+    def run(_) -> int:
+        board.initialize_game_board()
+        return 1
+    return measure(lambda: None, run)
+
+
+def bench_place_on_board(backend: type[GameBoard], size: int) -> float:
+    positions = random_order(size, random.Random(SEED))
+    symbols = [Symbol.X, Symbol.O] * (len(positions) // 2 + 1)
+
+    def setup() -> GameBoard:
+        board = backend(size)
+        board.initialize_game_board()
+        return board
+
+    def run(board: GameBoard) -> int:
+        place = board.place_on_board
+        for position, symbol in zip(positions, symbols):
+            place(position, symbol)
+        return len(positions)
+    return measure(setup, run)
+
+
+def play_random_game(game: TicTacToeGame, order: list[tuple[int, int]]) -> int:
+    moves = 0
+    for position in order:
+        game.register_turn(position)
+        moves += 1
+        if game.is_game_over():
+            break
+    return moves
+
+
+def bench_register_turn(backend: type[GameBoard], size: int) -> float:
+    rng = random.Random(SEED)
+    return measure(lambda: (new_game(backend, size), random_order(size, rng)), lambda s: play_random_game(*s))
+
+
+def bench_evaluate_game_state(backend: type[GameBoard], size: int) -> float:
+    game = new_game(backend, size)
+    fill_without_win(game.board, 0.5, SEED)
+
+    def run(_) -> int:
+        game.evaluate_game_state()
+        return 1
+    return measure(lambda: None, run)
+
+
+def bench_random_game(backend: type[GameBoard], size: int) -> float:
+    '''
+    Whole games from an empty board including setting the game up, seconds per game
+    '''
+    rng = random.Random(SEED)
+
+    def run(order: list[tuple[int, int]]) -> int:
+        play_random_game(new_game(backend, size), order)
+        return 1
+    return measure(lambda: random_order(size, rng), run)
+
+
+BENCHMARKS: dict[str, Callable[[type[GameBoard], int], float]] = {
+    'initialize_game_board': bench_initialize_game_board,
+    'place_on_board': bench_place_on_board,
+    'register_turn': bench_register_turn,
+    'evaluate_game_state': bench_evaluate_game_state,
+    'random_game': bench_random_game,
+}
+
+
+def result_key(benchmark: str, backend: str, size: int) -> str:
+    return f'{benchmark}/{backend}/{size}'
+
+
+def run_suite(sizes=SIZES, benchmarks=tuple(BENCHMARKS), backends=tuple(BACKENDS), progress=None) -> dict:
+    '''
+    :return: JSON ready results, results maps result_key to seconds per operation
+    '''
+    results = {}
+    for benchmark in benchmarks:
+        for backend in backends:
+            for size in sizes:
+                key = result_key(benchmark, backend, size)
+                results[key] = BENCHMARKS[benchmark](BACKENDS[backend], size)
+                if progress is not None:
+                    progress(key, results[key])
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[tuple[str, float, float]]:
+    '''
+    Only keys present in both runs are compared
+
+    :return: (key, baseline seconds, current seconds) for every result more than threshold slower than the baseline
+    '''
+    regressions = []
+    for key, seconds in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is not None and seconds > base * (1 + threshold):
+            regressions.append((key, base, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the core game model')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument('--out', type=Path, default=None, help='Write the results as JSON')
+    parser.add_argument('--compare', type=Path, default=None, help='Baseline JSON results to check against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown against the baseline, 0.1 is 10%%')
+    args = parser.parse_args()
+
+    current = run_suite(args.sizes, args.benchmarks, args.backends,
+                        progress=lambda key, seconds: print(f'{key:40}{seconds * 1e6:14.2f}us'))
+    if args.out is not None:
+        args.out.write_text(json.dumps(current, indent=2))
+    if args.compare is not None:
+        regressions = compare(json.loads(args.compare.read_text()), current, args.threshold)
+        for key, base, seconds in regressions:
+            print(f'REGRESSION {key}: {base * 1e6:.2f}us -> {seconds * 1e6:.2f}us ({seconds / base - 1:+.0%})')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions over {args.threshold:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+from functools import lru_cache
+from typing import Iterable, Sequence, Generator
+
+from tic_tac_toe.lines import get_line_table
+from tic_tac_toe.model import GameBoard, Symbol
+
+
+@lru_cache(maxsize=32)
+def win_masks(size: int) -> tuple[tuple[int, tuple[tuple[int, int], ...]], ...]:
+    '''
+    :return: (bit mask, path) for every winning line of the board size, in generate_paths order
+    '''
+    masks = []
+    for path in get_line_table(size).lines:
+        mask = 0
+        for x, y in path:
+            mask |= 1 << (x * size + y)
+        masks.append((mask, path))
+    return tuple(masks)
+
+
+class BitGameBoard(GameBoard):
+    '''
+    Drop in replacement for GameBoard that keeps one int bit mask per symbol. Bit (x * size + y) is set when
+    the symbol occupies position (x, y). game_board is still available as a column major list of lists for the
+    views, but it is only rebuilt after the board changes.
+    '''
+    def __init__(self, size: int):
+        # GameBoard.__init__ is not called because game_board is a read only view here
+        self.board_size = size
+        self.bits: dict[Symbol, int] = {s: 0 for s in Symbol}
+        self.full_mask = (1 << (size * size)) - 1
+        self.win_masks = win_masks(size)
+        self._columns: list[list] | None = None
+
+    @property
+    def game_board(self) -> list[list]:
+        if self._columns is None:
+            size = self.board_size
+            self._columns = [[self[(i, j)] for j in range(size)] for i in range(size)]
+        return self._columns
+
+    def initialize_game_board(self):
+        self.bits = {s: 0 for s in Symbol}
+        self._columns = None
+
+    def clear(self):
+        self.initialize_game_board()
+
+    def cell_bit(self, position: tuple[int, int]) -> int:
+        return 1 << (position[0] * self.board_size + position[1])
+
+    def check_position(self, position: tuple[int, int]):
+        size = self.board_size
+        if not (0 <= position[0] < size and 0 <= position[1] < size):
+            raise IndexError(f'Position {position} is not on the board')
+
+    @property
+    def occupied(self) -> int:
+        occupied = 0
+        for bits in self.bits.values():
+            occupied |= bits
+        return occupied
+
+    def __setitem__(self, key, value):
+        if type(key) is tuple:
+            self.check_position(key)
+            bit = self.cell_bit(key)
+            for symbol in self.bits:
+                self.bits[symbol] &= ~bit
+            if value is not None:
+                self.bits[value] |= bit
+            self._columns = None
+        else:
+            raise NotImplementedError('Use a tuple to set an item on the GameBoard')
+
+    def __getitem__(self, item):
+        if type(item) is slice:
+            raise NotImplementedError('What are you doing dumbass?')
+        if type(item) is tuple:
+            self.check_position(item)
+            bit = self.cell_bit(item)
+            for symbol, bits in self.bits.items():
+                if bits & bit:
+                    return symbol
+            return None
+        else:
+            return self.game_board[item]
+
+    def __iter__(self):
+        size = self.board_size
+        for i in range(size):
+            for j in range(size):
+                yield self[(i, j)]
+
+    def set_stones(self, stones: dict[Symbol, int]):
+        for symbol, mask in stones.items():
+            self.bits[symbol] |= mask
+        self._columns = None
+
+    def place_on_board(self, position: tuple[int, int], symbol: Symbol):
+        self.check_position(position)
+        bit = self.cell_bit(position)
+        if self.occupied & bit:
+            raise ValueError(f'There is already a symbol in position {position}')
+        self.bits[symbol] |= bit
+        self._columns = None
+
+    def has_won(self, symbol: Symbol) -> bool:
+        bits = self.bits[symbol]
+        for mask, _ in self.win_masks:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def find_win(self, paths: Iterable[Sequence[tuple[int, int]]] = ()) -> tuple[Symbol, list[tuple[int, int]]] | None:
+        '''
+        paths is ignored, the precomputed masks cover the same lines in the same order
+        '''
+        for mask, path in self.win_masks:
+            for symbol, bits in self.bits.items():
+                if bits & mask == mask:
+                    return symbol, list(path)
+
+    def is_full(self) -> bool:
+        return self.occupied == self.full_mask
+
+    def empty_cells(self) -> Generator[tuple[int, int], None, None]:
+        size = self.board_size
+        free = ~self.occupied & self.full_mask
+        while free:
+            low = free & -free
+            yield divmod(low.bit_length() - 1, size)
+            free ^= low
@@ -0,0 +1,28 @@
+from tic_tac_toe.model import GameBoard
+from tic_tac_toe.bitboard import BitGameBoard
+
+try:
+    from tic_tac_toe.numpy_board import NumpyGameBoard
+except ImportError:  # numpy is optional
+    NumpyGameBoard = None
+
+# Picked from tic_tac_toe.benchmarks.board_backends random_game, rerun it to re-tune. Playing a game goes through
+# register_turn, which never scans the board. There is no crossover: the list board was the fastest at every size
+# from 3 to 100 (at 100, 58 ms a game against 66 ms for numpy and 87 ms for bits), so the size does not pick the
+# backend. The bit and numpy boards pay off only where the whole board is read, engines and evaluate_game_state.
+DEFAULT_BACKEND = 'list'
+# Games computer players take part in, engines and evaluate_game_state read the whole board. The bit board hands its
+# masks straight to tic_tac_toe.engines.base.board_bits and evaluate is 3 to 4 times faster on it than on the list.
+ENGINE_BACKEND = 'bits'
+
+BACKENDS: dict[str, type[GameBoard]] = {'list': GameBoard, 'bits': BitGameBoard}
+if NumpyGameBoard is not None:
+    BACKENDS['numpy'] = NumpyGameBoard
+
+
+def create_game_board(size: int, backend: str | None = None) -> GameBoard:
+    '''
+    :param backend: Key of BACKENDS, None for DEFAULT_BACKEND. The backend is the same at every size.
+    :return: An empty board
+    '''
+    return BACKENDS[DEFAULT_BACKEND if backend is None else backend](size)
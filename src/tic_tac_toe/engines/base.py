@@ -0,0 +1,58 @@
+import random
+from abc import ABC, abstractmethod
+
+from tic_tac_toe.model import TicTacToeGame, GameBoard, Symbol
+
+
+class MoveEngine(ABC):
+    @abstractmethod
+    def choose_move(self, game: TicTacToeGame) -> tuple[int, int]:
+        '''
+        :return: The position the game's current player should play, the game is not modified
+        '''
+        pass
+
+    def reset(self):
+        pass
+
+
+def board_bits(board: GameBoard) -> dict[Symbol, int]:
+    '''
+    :return: One bit mask per symbol with bit (x * size + y) set where the symbol is placed
+    '''
+    bits = getattr(board, 'bits', None)
+    if bits is not None:
+        return dict(bits)
+    bits = {s: 0 for s in Symbol}
+    for cell, symbol in enumerate(board):
+        if symbol is not None:
+            bits[symbol] |= 1 << cell
+    return bits
+
+
+def side_bits(game: TicTacToeGame) -> tuple[int, int]:
+    '''
+    :return: (stones of the player to move, stones of everyone else)
+    '''
+    bits = board_bits(game.board)
+    me = bits.pop(game.current_player.symbol)
+    others = 0
+    for b in bits.values():
+        others |= b
+    return me, others
+
+
+def cell_position(cell: int, size: int) -> tuple[int, int]:
+    return divmod(cell, size)
+
+
+class RandomEngine(MoveEngine):
+    def __init__(self, seed: int | None = None):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game: TicTacToeGame) -> tuple[int, int]:
+        size = game.board.board_size
+        me, others = side_bits(game)
+        occupied = me | others
+        free = [cell for cell in range(size * size) if not occupied >> cell & 1]
+        return cell_position(self.rng.choice(free), size)
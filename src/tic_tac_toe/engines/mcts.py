@@ -0,0 +1,188 @@
+import math
+import random
+from time import perf_counter
+
+from tic_tac_toe.engines.base import MoveEngine, side_bits, cell_position
+from tic_tac_toe.engines.negamax import SearchTables
+from tic_tac_toe.model import TicTacToeGame
+
+WIN, DRAW, LOSS = 1, 0, -1
+
+
+class MCTSNode:
+    '''
+    me holds the stones of the player to move in this node, others everyone else's. wins is counted for the player
+    who made move to reach this node, which is what the parent needs when picking between its children.
+    '''
+    __slots__ = ('me', 'others', 'parent', 'move', 'terminal', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, me: int, others: int, parent: 'MCTSNode | None', move: int, terminal: int | None,
+                 untried: list[int]):
+        self.me = me
+        self.others = others
+        self.parent = parent
+        self.move = move
+        self.terminal = terminal  # None, or the result for the player to move (LOSS or DRAW) when the game is over
+        self.children: list[MCTSNode] = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTSEngine(MoveEngine):
+    '''
+    Monte Carlo tree search with UCT selection and uniformly random playouts. The tree below the move that was
+    played is kept between moves and reused when the opponent's reply is found in it.
+
+    :param time_limit: Seconds per move
+    :param playouts: Playouts per move, whichever of the two budgets runs out first stops the search
+    '''
+    def __init__(self, time_limit: float | None = 1.0, playouts: int | None = None, exploration: float = math.sqrt(2),
+                 seed: int | None = None):
+        if time_limit is None and playouts is None:
+            raise ValueError('MCTSEngine needs a time_limit or a playouts budget')
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.tables: SearchTables | None = None
+        self.root: MCTSNode | None = None
+        self.last_playouts = 0
+        self.last_elapsed = 0.0
+
+    @property
+    def playouts_per_second(self) -> float:
+        if self.last_elapsed == 0:
+            return 0.0
+        return self.last_playouts / self.last_elapsed
+
+    def reset(self):
+        self.root = None
+
+    def choose_move(self, game: TicTacToeGame) -> tuple[int, int]:
+        size = game.board.board_size
+        me, others = side_bits(game)
+        root = self.search(size, me, others)
+        best = max(root.children, key=lambda child: child.visits)
+        self.root = best
+        return cell_position(best.move, size)
+
+    def search(self, size: int, me: int, others: int) -> MCTSNode:
+        '''
+        Run one budget worth of playouts from the position and return its root node
+        '''
+        if self.tables is None or self.tables.size != size:
+            self.tables = SearchTables.get(size)
+            self.root = None
+        root = self.find_reusable_root(me, others)
+        if root is None:
+            if (me | others) == (1 << (size * size)) - 1:
+                raise ValueError('There are no moves left on the board')
+            root = self.new_node(me, others, None, -1, None)
+        root.parent = None
+        self.root = root
+
+        start = perf_counter()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        playouts = 0
+        while True:
+            self.run_playout(root)
+            playouts += 1
+            if self.playouts is not None and playouts >= self.playouts:
+                break
+            if deadline is not None and playouts & 15 == 0 and perf_counter() > deadline:
+                break
+        self.last_playouts = playouts
+        self.last_elapsed = perf_counter() - start
+        return root
+
+    def find_reusable_root(self, me: int, others: int) -> MCTSNode | None:
+        '''
+        The previous root is the position after our last move, look for the position now on the board among it and
+        its children
+        '''
+        root = self.root
+        if root is None:
+            return None
+        if root.me == me and root.others == others:
+            return root
+        for child in root.children:
+            if child.me == me and child.others == others:
+                return child
+        return None
+
+    def new_node(self, me: int, others: int, parent: MCTSNode | None, move: int, terminal: int | None) -> MCTSNode:
+        if terminal is None:
+            occupied = me | others
+            untried = [c for c in range(self.tables.size ** 2) if not occupied >> c & 1]
+            self.rng.shuffle(untried)
+        else:
+            untried = []
+        return MCTSNode(me, others, parent, move, terminal, untried)
+
+    def play(self, me: int, others: int, cell: int) -> tuple[int, int, int | None]:
+        '''
+        :return: The child position (me, others, terminal) after the player to move takes cell
+        '''
+        tables = self.tables
+        new_me = me | (1 << cell)
+        for mask in tables.cell_masks[cell]:
+            if new_me & mask == mask:
+                return others, new_me, LOSS
+        if (new_me | others).bit_count() == tables.size * tables.size:
+            return others, new_me, DRAW
+        return others, new_me, None
+
+    def run_playout(self, root: MCTSNode):
+        node = root
+        # Selection
+        while node.terminal is None and not node.untried:
+            node = self.select_child(node)
+        # Expansion
+        if node.terminal is None:
+            cell = node.untried.pop()
+            me, others, terminal = self.play(node.me, node.others, cell)
+            child = self.new_node(me, others, node, cell, terminal)
+            node.children.append(child)
+            node = child
+        # Simulation, result for the player to move in node
+        result = node.terminal if node.terminal is not None else self.random_game(node.me, node.others)
+        # Backpropagation
+        reward = (1 - result) / 2
+        while node is not None:
+            node.visits += 1
+            node.wins += reward
+            reward = 1 - reward
+            node = node.parent
+
+    def select_child(self, node: MCTSNode) -> MCTSNode:
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best = None
+        best_score = -1.0
+        for child in node.children:
+            score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+    def random_game(self, me: int, others: int) -> int:
+        '''
+        :return: WIN, DRAW or LOSS for the player to move
+        '''
+        tables = self.tables
+        occupied = me | others
+        free = [c for c in range(tables.size ** 2) if not occupied >> c & 1]
+        self.rng.shuffle(free)
+        stones = [me, others]
+        turn = 0
+        cell_masks = tables.cell_masks
+        for cell in free:
+            placed = stones[turn] | (1 << cell)
+            stones[turn] = placed
+            for mask in cell_masks[cell]:
+                if placed & mask == mask:
+                    return WIN if turn == 0 else LOSS
+            turn ^= 1
+        return DRAW
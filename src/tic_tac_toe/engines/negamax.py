@@ -0,0 +1,252 @@
+from time import perf_counter
+
+from tic_tac_toe.engines.base import MoveEngine, side_bits, cell_position
+from tic_tac_toe.lines import get_line_table
+from tic_tac_toe.model import TicTacToeGame, Symbol
+from tic_tac_toe.symmetry import symmetry_permutations, inverse_permutations
+from tic_tac_toe.zobrist import zobrist_keys, zobrist_side_keys
+
+# Wins score WIN_SCORE minus the number of stones on the board when the game ended, which prefers quick wins
+# and slow losses while keeping scores independent of the path taken to a position.
+WIN_SCORE = 1_000_000
+HEURISTIC_LIMIT = WIN_SCORE // 2
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchTables:
+    '''
+    Everything the search needs about one board size, built once and shared
+    '''
+    _cache: dict[int, 'SearchTables'] = {}
+
+    def __init__(self, size: int):
+        self.size = size
+        table = get_line_table(size)
+        self.line_masks = tuple(sum(1 << (x * size + y) for x, y in line) for line in table.lines)
+        self.cell_masks = tuple(
+            tuple(self.line_masks[i] for i in table.cell_lines[cell_position(cell, size)])
+            for cell in range(size * size)
+        )
+        perms = symmetry_permutations(size)
+        self.inverse_perms = inverse_permutations(size)
+        self.perms = perms
+        keys = zobrist_keys(size)
+        self.side_keys = zobrist_side_keys(size)
+        # sym_keys[symbol_idx][cell] holds the key of cell under every symmetry, so all 8 hashes update together.
+        # The keys also hand the move over from symbol_idx to the next symbol.
+        sides = self.side_keys
+        self.sym_keys = tuple(
+            tuple(tuple(keys[s][perm[cell]] ^ sides[s] ^ sides[(s + 1) % len(sides)] for perm in perms)
+                  for cell in range(size * size))
+            for s in range(len(keys))
+        )
+        # Cells on more lines first, the center and diagonals are the strongest squares
+        self.move_order = tuple(sorted(range(size * size), key=lambda c: -len(self.cell_masks[c])))
+        self.line_weights = tuple(0 if i == 0 else 4 ** i for i in range(size + 1))
+
+    @classmethod
+    def get(cls, size: int) -> 'SearchTables':
+        if size not in cls._cache:
+            cls._cache[size] = SearchTables(size)
+        return cls._cache[size]
+
+
+class NegamaxEngine(MoveEngine):
+    '''
+    Negamax with alpha-beta pruning and iterative deepening. Positions are stored in a transposition table keyed by
+    the smallest of the 8 symmetric Zobrist hashes, so every rotation and reflection of a position shares one entry
+    and symmetric sibling moves are only searched once.
+
+    :param time_limit: Seconds per move, the best move of the deepest completed iteration is played
+    :param max_depth: Plies searched per move, None searches to the end of the game
+    '''
+    def __init__(self, time_limit: float | None = 1.0, max_depth: int | None = None, max_table_entries: int = 2_000_000):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.max_table_entries = max_table_entries
+        self.table: dict[int, tuple[int, int, int, int]] = {}  # hash -> (depth, flag, score, canonical best cell)
+        self.nodes = 0
+        self.deadline = None
+        self.tables: SearchTables | None = None
+        self.last_score = 0
+        self.last_depth = 0
+
+    def reset(self):
+        self.table.clear()
+
+    def choose_move(self, game: TicTacToeGame) -> tuple[int, int]:
+        size = game.board.board_size
+        if self.tables is None or self.tables.size != size:
+            self.tables = SearchTables.get(size)
+            self.table.clear()
+        tables = self.tables
+        if len(self.table) > self.max_table_entries:
+            self.table.clear()
+
+        me, others = side_bits(game)
+        symbols = list(Symbol)
+        color = symbols.index(game.current_player.symbol)
+        other_color = (color + 1) % len(symbols)
+        keys = zobrist_keys(size)
+        hashes = []
+        for perm in tables.perms:
+            h = tables.side_keys[color]
+            for cell in range(size * size):
+                bit = 1 << cell
+                if me & bit:
+                    h ^= keys[color][perm[cell]]
+                elif others & bit:
+                    h ^= keys[other_color][perm[cell]]
+            hashes.append(h)
+        hashes = tuple(hashes)
+
+        stones = (me | others).bit_count()
+        empties = size * size - stones
+        if empties == 0:
+            raise ValueError('There are no moves left on the board')
+        max_depth = empties if self.max_depth is None else min(self.max_depth, empties)
+
+        key = min(hashes)
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= max_depth and entry[1] == EXACT:  # Already searched this deep
+            self.last_score, self.last_depth = entry[2], entry[0]
+            return cell_position(tables.inverse_perms[hashes.index(key)][entry[3]], size)
+
+        self.nodes = 0
+        self.deadline = None if self.time_limit is None else perf_counter() + self.time_limit
+        best_cell = None
+        first_depth = 1 if self.time_limit is not None else max_depth
+        for depth in range(first_depth, max_depth + 1):
+            try:
+                score, cell = self.search_root(me, others, color, other_color, hashes, stones, depth)
+            except SearchTimeout:
+                break
+            best_cell = cell
+            self.last_score = score
+            self.last_depth = depth
+            if abs(score) > WIN_SCORE - size * size - 1:  # Forced result found
+                break
+        if best_cell is None:  # Not even depth 1 finished, play the most promising free square
+            occupied = me | others
+            best_cell = next(c for c in tables.move_order if not occupied >> c & 1)
+        return cell_position(best_cell, size)
+
+    def search_root(self, me: int, others: int, color: int, other_color: int, hashes: tuple[int, ...], stones: int,
+                    depth: int) -> tuple[int, int]:
+        alpha = -WIN_SCORE - 1
+        best_cell = None
+        tables = self.tables
+        seen = set()
+        for cell in self.ordered_moves(me | others, hashes):
+            bit = 1 << cell
+            child_hashes = tuple(h ^ k for h, k in zip(hashes, tables.sym_keys[color][cell]))
+            key = min(child_hashes)
+            if key in seen:
+                continue
+            seen.add(key)
+            score = self.score_move(me, others, bit, cell, color, other_color, child_hashes, stones, depth,
+                                    alpha, WIN_SCORE + 1)
+            if best_cell is None or score > alpha:
+                alpha = score
+                best_cell = cell
+        key = min(hashes)
+        self.table[key] = (depth, EXACT, alpha, tables.perms[hashes.index(key)][best_cell])
+        return alpha, best_cell
+
+    def ordered_moves(self, occupied: int, hashes: tuple[int, ...]) -> list[int]:
+        tables = self.tables
+        moves = [c for c in tables.move_order if not occupied >> c & 1]
+        key = min(hashes)
+        entry = self.table.get(key)
+        if entry is not None and entry[3] >= 0:
+            transform = hashes.index(key)
+            best = tables.inverse_perms[transform][entry[3]]
+            if best in moves:
+                moves.remove(best)
+                moves.insert(0, best)
+        return moves
+
+    def score_move(self, me: int, others: int, bit: int, cell: int, color: int, other_color: int,
+                   child_hashes: tuple[int, ...], stones: int, depth: int, alpha: int, beta: int) -> int:
+        '''
+        :return: Score of playing cell for the side to move
+        '''
+        tables = self.tables
+        new_me = me | bit
+        for mask in tables.cell_masks[cell]:
+            if new_me & mask == mask:
+                return WIN_SCORE - (stones + 1)
+        if stones + 1 == tables.size * tables.size:
+            return 0
+        return -self.negamax(others, new_me, other_color, color, child_hashes, stones + 1, depth - 1, -beta, -alpha)
+
+    def negamax(self, me: int, others: int, color: int, other_color: int, hashes: tuple[int, ...], stones: int,
+                depth: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 1023 == 0 and perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if depth == 0:
+            return self.evaluate(me, others)
+
+        key = min(hashes)
+        entry = self.table.get(key)
+        alpha_orig = alpha
+        if entry is not None and entry[0] >= depth:
+            _, flag, score, _ = entry
+            if flag == EXACT:
+                return score
+            if flag == LOWER:
+                alpha = max(alpha, score)
+            elif flag == UPPER:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+
+        tables = self.tables
+        best = -WIN_SCORE - 1
+        best_cell = -1
+        seen = set()
+        for cell in self.ordered_moves(me | others, hashes):
+            child_hashes = tuple(h ^ k for h, k in zip(hashes, tables.sym_keys[color][cell]))
+            child_key = min(child_hashes)
+            if child_key in seen:  # A symmetric sibling was already searched
+                continue
+            seen.add(child_key)
+            score = self.score_move(me, others, 1 << cell, cell, color, other_color, child_hashes, stones, depth,
+                                    alpha, beta)
+            if score > best:
+                best = score
+                best_cell = cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        canonical_cell = tables.perms[hashes.index(key)][best_cell] if best_cell >= 0 else -1
+        self.table[key] = (depth, flag, best, canonical_cell)
+        return best
+
+    def evaluate(self, me: int, others: int) -> int:
+        '''
+        Heuristic for unfinished positions, lines only one side can still complete count for that side
+        '''
+        weights = self.tables.line_weights
+        score = 0
+        for mask in self.tables.line_masks:
+            mine = (me & mask).bit_count()
+            theirs = (others & mask).bit_count()
+            if theirs == 0:
+                score += weights[mine]
+            elif mine == 0:
+                score -= weights[theirs]
+        return max(-HEURISTIC_LIMIT, min(HEURISTIC_LIMIT, score))
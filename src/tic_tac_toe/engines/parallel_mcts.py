@@ -0,0 +1,109 @@
+import math
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from tic_tac_toe.engines.base import MoveEngine, side_bits, cell_position
+from tic_tac_toe.engines.mcts import MCTSEngine
+from tic_tac_toe.model import TicTacToeGame
+
+
+def search_root_visits(size: int, me: int, others: int, time_limit: float | None, playouts: int | None,
+                       exploration: float, seed: int) -> tuple[dict[int, int], int]:
+    '''
+    Worker entry point, builds an independent tree from the position
+
+    :return: (visits of each root move, playouts run)
+    '''
+    engine = MCTSEngine(time_limit=time_limit, playouts=playouts, exploration=exploration, seed=seed)
+    root = engine.search(size, me, others)
+    return {child.move: child.visits for child in root.children}, engine.last_playouts
+
+
+def warm_up(_=None):
+    return os.getpid()
+
+
+class ParallelMCTSEngine(MoveEngine):
+    '''
+    Root parallel MCTS, every worker process searches its own tree from the current position and the root visit
+    counts are summed to pick the move. The process pool is created on first use and kept until close(), so only
+    the first move pays for starting the workers.
+
+    :param workers: Number of worker processes, defaults to os.cpu_count()
+    :param time_limit: Seconds per move for every worker
+    :param playouts: Playouts per move for every worker
+    '''
+    def __init__(self, workers: int | None = None, time_limit: float | None = 1.0, playouts: int | None = None,
+                 exploration: float = math.sqrt(2), seed: int | None = None):
+        if time_limit is None and playouts is None:
+            raise ValueError('ParallelMCTSEngine needs a time_limit or a playouts budget')
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.executor: ProcessPoolExecutor | None = None
+        self.last_visits: Counter = Counter()
+        self.last_playouts = 0
+        self.last_elapsed = 0.0
+
+    @property
+    def playouts_per_second(self) -> float:
+        if self.last_elapsed == 0:
+            return 0.0
+        return self.last_playouts / self.last_elapsed
+
+    def start(self):
+        '''
+        Start the worker processes now instead of on the first move
+        '''
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            list(self.executor.map(warm_up, range(self.workers)))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        # Engines are shipped to tournament workers, the pool stays behind
+        state = self.__dict__.copy()
+        state['executor'] = None
+        return state
+
+    def choose_move(self, game: TicTacToeGame) -> tuple[int, int]:
+        size = game.board.board_size
+        me, others = side_bits(game)
+        if (me | others) == (1 << (size * size)) - 1:
+            raise ValueError('There are no moves left on the board')
+        self.start()
+
+        start = perf_counter()
+        futures = [
+            self.executor.submit(search_root_visits, size, me, others, self.time_limit, self.playouts,
+                                 self.exploration, self.rng.getrandbits(32))
+            for _ in range(self.workers)
+        ]
+        visits = Counter()
+        playouts = 0
+        for future in futures:
+            worker_visits, worker_playouts = future.result()
+            visits.update(worker_visits)
+            playouts += worker_playouts
+        self.last_elapsed = perf_counter() - start
+        self.last_playouts = playouts
+        self.last_visits = visits
+
+        cell, _ = visits.most_common(1)[0]
+        return cell_position(cell, size)
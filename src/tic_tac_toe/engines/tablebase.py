@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from tic_tac_toe.engines.base import MoveEngine
+from tic_tac_toe.model import TicTacToeGame
+from tic_tac_toe.tablebase import Tablebase
+
+
+class TablebaseEngine(MoveEngine):
+    '''
+    Perfect play straight out of a tablebase file made by tic_tac_toe.tablebase, no search involved
+    '''
+    def __init__(self, path: Path | str):
+        self.tablebase = Tablebase(path)
+
+    def choose_move(self, game: TicTacToeGame) -> tuple[int, int]:
+        return self.tablebase.best_move(game)
+
+    def close(self):
+        self.tablebase.close()
@@ -0,0 +1,232 @@
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from types import MethodType
+from typing import Generator
+
+from tic_tac_toe.boards import BACKENDS
+from tic_tac_toe.model import TicTacToeGame, GameBoard
+
+# Instrumentation works by swapping the instrumented methods for wrappers while enabled, either on TicTacToeGame and
+# the board classes for every game in the process (games other threads play included) or on a single game's and
+# its board's instances. Disabled, the original functions are back in place, so there is no cost at all. Times are
+# inclusive, register_turn includes play_turn which includes update_line_counts, evaluate_game_state includes
+# find_win, the board's scan of the paths (path_winner on the list board).
+TIMED_METHODS = ('register_turn', 'play_turn', 'update_line_counts', 'undo', 'redo', 'evaluate_game_state')
+TIMED_BOARD_METHODS = ('find_win',)
+
+_timers: dict[str, list] = {name: [0, 0.0] for name in (*TIMED_METHODS, *TIMED_BOARD_METHODS)}  # [calls, seconds]
+_counters: dict[str, int] = {'lines_touched': 0, 'paths_generated': 0, 'cells_scanned': 0}
+_originals: dict[str, object] = {}  # TicTacToeGame's own methods while every game is instrumented
+_board_originals: dict[type, object] = {}  # Board class -> its own find_win while every game is instrumented
+_games: dict[int, TicTacToeGame] = {}  # id -> game instrumented on its own
+
+
+def reset():
+    # In place, the wrappers hold on to the timer lists
+    for timer in _timers.values():
+        timer[0] = 0
+        timer[1] = 0.0
+    for name in _counters:
+        _counters[name] = 0
+
+
+def timed(name: str, func):
+    timer = _timers[name]
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timer[0] += 1
+            timer[1] += perf_counter() - start
+    return wrapper
+
+
+def counted_lines(func):
+    '''
+    Counts the line counters a move or undo updates, the position is the first argument or the return value
+    '''
+    @wraps(func)
+    def wrapper(self, *args):
+        result = func(self, *args)
+        position = args[0] if args else result
+        _counters['lines_touched'] += len(self.line_table.cell_lines[position])
+        return result
+    return wrapper
+
+
+class CountingBoard:
+    '''
+    Stands in for a board while its find_win runs, counts the cells path_winner reads
+    '''
+    __slots__ = ('board',)
+
+    def __init__(self, board: GameBoard):
+        self.board = board
+
+    def __getitem__(self, item):
+        _counters['cells_scanned'] += 1
+        return self.board[item]
+
+    def __getattr__(self, name):
+        return getattr(self.board, name)
+
+
+def counted_cells(func):
+    @wraps(func)
+    def wrapper(self, *args):
+        return func(CountingBoard(self), *args)
+    return wrapper
+
+
+def counted_generate_paths(func):
+    @wraps(func)
+    def wrapper(self):
+        for path in func(self):
+            _counters['paths_generated'] += 1
+            yield path
+    return wrapper
+
+
+def original_methods() -> dict[str, object]:
+    return {name: _originals.get(name, TicTacToeGame.__dict__[name]) for name in (*TIMED_METHODS, 'generate_paths')}
+
+
+def wrappers() -> dict[str, object]:
+    '''
+    :return: Method name -> instrumented function taking self, built around TicTacToeGame's own methods
+    '''
+    originals = original_methods()
+    methods = {name: originals[name] for name in TIMED_METHODS}
+    for name in ('update_line_counts', 'undo'):
+        methods[name] = counted_lines(methods[name])
+    methods = {name: timed(name, func) for name, func in methods.items()}
+    methods['generate_paths'] = counted_generate_paths(originals['generate_paths'])
+    return methods
+
+
+def find_win_owner(board_class: type) -> type:
+    return next(cls for cls in board_class.__mro__ if 'find_win' in cls.__dict__)
+
+
+def board_wrapper(cls: type):
+    '''
+    :param cls: A board class with a find_win of its own
+    :return: Instrumented find_win, cells are counted where they are read one by one, GameBoard's path_winner scan.
+             The bit and numpy boards test whole lines at once and read none.
+    '''
+    func = _board_originals.get(cls, cls.__dict__['find_win'])
+    if cls is GameBoard:
+        func = counted_cells(func)
+    return timed('find_win', func)
+
+
+def is_enabled(game: TicTacToeGame | None = None) -> bool:
+    '''
+    :param game: None asks whether every game is instrumented
+    '''
+    if game is None:
+        return bool(_originals)
+    return bool(_originals) or id(game) in _games
+
+
+def enable(game: TicTacToeGame | None = None):
+    '''
+    Start counting, counts carry on from where they were, call reset to start over. Counts are shared, with several
+    games instrumented they add up.
+
+    :param game: Instrument only this game, None instruments every TicTacToeGame
+    '''
+    if is_enabled(game):
+        return
+    if game is None:
+        methods = wrappers()
+        board_classes = {find_win_owner(cls) for cls in (GameBoard, *BACKENDS.values())}
+        board_methods = {cls: board_wrapper(cls) for cls in board_classes}
+        _originals.update(original_methods())
+        for name, func in methods.items():
+            setattr(TicTacToeGame, name, func)
+        for cls, func in board_methods.items():
+            _board_originals[cls] = cls.__dict__['find_win']
+            cls.find_win = func
+    else:
+        # Instance attributes shadow the class methods, self calls inside the game go through them too
+        for name, func in wrappers().items():
+            setattr(game, name, MethodType(func, game))
+        board = game.board
+        board.find_win = MethodType(board_wrapper(find_win_owner(type(board))), board)
+        _games[id(game)] = game
+
+
+def disable(game: TicTacToeGame | None = None):
+    '''
+    :param game: Stop instrumenting this game, None stops instrumenting every TicTacToeGame. Games enabled on their
+                 own stay instrumented until disabled on their own.
+    '''
+    if game is None:
+        for name, func in _originals.items():
+            setattr(TicTacToeGame, name, func)
+        for cls, func in _board_originals.items():
+            cls.find_win = func
+        _originals.clear()
+        _board_originals.clear()
+    elif _games.pop(id(game), None) is not None:
+        for name in (*TIMED_METHODS, 'generate_paths'):
+            delattr(game, name)
+        del game.board.find_win
+
+
+def stats() -> dict:
+    '''
+    Snapshot of everything counted so far. lines_touched counts the line counters updated by moves and undos,
+    paths_generated the paths evaluate_game_state handed to find_win and cells_scanned the cells path_winner read
+    checking them.
+
+    :return: {method: {'calls', 'seconds', 'mean_seconds'}, 'lines_touched': n, 'paths_generated': n,
+              'cells_scanned': n}
+    '''
+    snapshot: dict = {}
+    for name, (calls, seconds) in _timers.items():
+        snapshot[name] = {'calls': calls, 'seconds': seconds, 'mean_seconds': seconds / calls if calls else 0.0}
+    snapshot.update(_counters)
+    return snapshot
+
+
+def difference(after: dict, before: dict) -> dict:
+    result = {}
+    for key, value in after.items():
+        if isinstance(value, dict):
+            calls = value['calls'] - before[key]['calls']
+            seconds = value['seconds'] - before[key]['seconds']
+            result[key] = {'calls': calls, 'seconds': seconds, 'mean_seconds': seconds / calls if calls else 0.0}
+        else:
+            result[key] = value - before[key]
+    return result
+
+
+class Measurement:
+    def __init__(self):
+        self.stats: dict = {}
+
+
+@contextmanager
+def measure(game: TicTacToeGame | None = None) -> Generator[Measurement, None, None]:
+    '''
+    Instrument the block, the yielded Measurement's stats hold only what happened inside it once the block exits.
+    Instrumentation is left enabled afterwards only if it was enabled before.
+
+    :param game: Only measure this game, None measures every TicTacToeGame in the process
+    '''
+    was_enabled = is_enabled(game)
+    enable(game)
+    measurement = Measurement()
+    before = stats()
+    try:
+        yield measurement
+    finally:
+        measurement.stats = difference(stats(), before)
+        if not was_enabled:
+            disable(game)
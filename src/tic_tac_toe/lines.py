@@ -0,0 +1,56 @@
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+LINE_TABLE_CACHE_SIZE = 16
+
+Path = tuple[tuple[int, int], ...]
+
+
+class LineTable:
+    '''
+    Immutable geometry of every winning line on a square board of one size, shared by everything playing on
+    that size. Lines are in generate_paths order, cell_lines maps a position to the indexes of the lines
+    passing through it.
+    '''
+    __slots__ = ('size', 'lines', 'cell_lines')
+
+    def __init__(self, size: int):
+        lines = []
+        for i in range(size):
+            lines.append(tuple((i, j) for j in range(size)))
+            lines.append(tuple((j, i) for j in range(size)))
+
+        #assuming the gameboard is square
+        lines.append(tuple((i, i) for i in range(size)))
+        lines.append(tuple((i, (size-1)-i) for i in range(size)))
+
+        cell_lines: dict[tuple[int, int], list[int]] = {(x, y): [] for x in range(size) for y in range(size)}
+        for line_idx, line in enumerate(lines):
+            for position in line:
+                cell_lines[position].append(line_idx)
+
+        object.__setattr__(self, 'size', size)
+        object.__setattr__(self, 'lines', tuple(lines))
+        object.__setattr__(self, 'cell_lines', MappingProxyType({k: tuple(v) for k, v in cell_lines.items()}))
+
+    size: int
+    lines: tuple[Path, ...]
+    cell_lines: Mapping[tuple[int, int], tuple[int, ...]]
+
+    def __setattr__(self, key, value):
+        raise AttributeError('LineTable is immutable')
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __repr__(self):
+        return f'LineTable(size={self.size}, lines={len(self.lines)})'
+
+
+@lru_cache(maxsize=LINE_TABLE_CACHE_SIZE)
+def get_line_table(size: int) -> LineTable:
+    '''
+    Use get_line_table.cache_info() / get_line_table.cache_clear() to inspect or reset the shared tables
+    '''
+    return LineTable(size)
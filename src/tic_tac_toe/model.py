@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
 from enum import Enum
+from itertools import cycle, islice, repeat
 from typing import Sequence, Iterable, Generator
 
+from tic_tac_toe.lines import get_line_table, LineTable
+from tic_tac_toe.zobrist import zobrist_keys, zobrist_side_keys
+
 
 class Symbol(Enum):
     X = 'x'
@@ -19,6 +23,27 @@ def all_equal(lis: Iterable):
         return True
 
 
+BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+def mask_cells(mask: int) -> list[int]:
+    '''
+    :return: The set bits of mask lowest first, one step per byte plus one per set bit
+    '''
+    cells = []
+    for i, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, 'little')):
+        if byte:
+            base = i * 8
+            cells.extend(base + bit for bit in BYTE_BITS[byte])
+    return cells
+
+
+def path_winner(board: 'GameBoard', path: Sequence[tuple[int, int]]) -> 'Symbol | None':
+    if all_equal(board[x] for x in path):
+        symbol = board[path[0]]
+        if isinstance(symbol, Symbol):
+            return symbol
+
 
 class GameBoard:
     def __init__(self, size: int):
@@ -54,19 +79,72 @@ class GameBoard:
             for item in column:
                 yield item
 
+    def set_stones(self, stones: dict['Symbol', int]):
+        '''
+        Place every stone of an empty board at once from one bit mask per symbol, bit x * size + y per cell
+        '''
+        size = self.board_size
+        board = self.game_board
+        for symbol, mask in stones.items():
+            for cell in mask_cells(mask):
+                x, y = divmod(cell, size)
+                board[x][y] = symbol
+
     def place_on_board(self, position: tuple[int, int], symbol: Symbol):
         if self[position] is not None:
             raise ValueError(f'There is already a symbol in position {position}')
         self[position] = symbol
 
+    def find_win(self, paths: Iterable[Sequence[tuple[int, int]]]) -> tuple[Symbol, Sequence[tuple[int, int]]] | None:
+        '''
+        Board backends with a faster representation override this and may ignore paths
+
+        :return: The winning symbol and the first path it won on, or None
+        '''
+        for path in paths:
+            if (v := path_winner(self, path)) is not None:
+                return v, path
+
+    def is_full(self) -> bool:
+        for val in self:
+            if val is None:
+                return False
+        return True
+
     def __str__(self):
         return str(self.game_board)
 
 
+SYMBOL_INDEX: dict[Symbol, int] = {s: i for i, s in enumerate(Symbol)}
+
+
+class MoveRecord:
+    __slots__ = ('position', 'player_idx', 'winner', 'winning_path')
+
+    def __init__(self, position: tuple[int, int], player_idx: int, winner, winning_path):
+        self.position = position
+        self.player_idx = player_idx
+        self.winner = winner
+        self.winning_path = winning_path
+
+
 class Player:
     def __init__(self, name:str, symbol: Symbol):
         self.name = name
         self.symbol = symbol
+        self.engine = None  # tic_tac_toe.engines.base.MoveEngine when the computer picks this player's moves
+
+    def is_computer(self) -> bool:
+        return self.engine is not None
+
+
+class ComputerPlayer(Player):
+    def __init__(self, name: str, symbol: Symbol, engine):
+        super(ComputerPlayer, self).__init__(name, symbol)
+        self.engine = engine
+
+    def choose_move(self, game: 'TicTacToeGame') -> tuple[int, int]:
+        return self.engine.choose_move(game)
 
 
 class TicTacToeGame:
@@ -77,65 +155,167 @@ class TicTacToeGame:
         self.current_player_idx = 0
         self.winner = -1
         self.winning_path = None
+        self.line_table: LineTable = get_line_table(game_board.board_size)
+        self.line_counts: dict[Symbol, list[int]] = {}
+        self.filled_cells = 0
+        self.history: list[MoveRecord] = []
+        self.redo_stack: list[tuple[int, int]] = []
+        self.stones_hash = 0
+        self.reset_line_counts()
 
     def initialize(self):
         self.board.initialize_game_board()
         self.winner = -1
         self.winning_path = None
+        self.reset_line_counts()
+        self.history = []
+        self.redo_stack = []
+        self.stones_hash = 0
+
+    def reset_line_counts(self):
+        # One counter per path in generate_paths order, per symbol
+        self.line_table = get_line_table(self.board.board_size)
+        n_lines = len(self.line_table)
+        self.line_counts = {symbol: [0] * n_lines for symbol in Symbol}
+        self.filled_cells = 0
 
     def set_player_turn(self, player: Player):
         self.current_player = player
 
+    @property
+    def zobrist_hash(self) -> int:
+        '''
+        64 bit hash of the stones on the board and the player to move
+        '''
+        size = self.board.board_size
+        if self.current_player is None:
+            return self.stones_hash
+        return self.stones_hash ^ zobrist_side_keys(size)[SYMBOL_INDEX[self.current_player.symbol]]
+
+    def stone_key(self, position: tuple[int, int], symbol: Symbol) -> int:
+        size = self.board.board_size
+        return zobrist_keys(size)[SYMBOL_INDEX[symbol]][position[0] * size + position[1]]
+
     def register_turn(self, position: tuple[int, int]):
+        self.play_turn(position)
+        self.redo_stack.clear()
+
+    def play_turn(self, position: tuple[int, int]):
         if self.is_game_over():
             raise ValueError('Game is over, no placing peices')
         player = self.current_player
 
         self.board.place_on_board(position, player.symbol)
+        self.history.append(MoveRecord(position, self.current_player_idx, self.winner, self.winning_path))
+        self.stones_hash ^= self.stone_key(position, player.symbol)
 
-        try:
-            state = self.evaluate_game_state()
-            if isinstance(state, Symbol):
-                self.game_over(player)
-            else:
-                self.current_player_idx += 1
-                self.current_player_idx %= len(self.players)
-                self.current_player = self.players[self.current_player_idx]
-        except ValueError:
+        state = self.update_line_counts(position, player.symbol)
+        if isinstance(state, Symbol):
+            self.game_over(player)
+        elif self.filled_cells == self.board.board_size ** 2:
             self.game_over(None)
+        else:
+            self.current_player_idx += 1
+            self.current_player_idx %= len(self.players)
+            self.current_player = self.players[self.current_player_idx]
+
+    def update_line_counts(self, position: tuple[int, int], symbol: Symbol) -> Symbol | None:
+        '''
+        Only the paths through the newly placed position can change, so this is the incremental
+        equivalent of evaluate_game_state for a single move.
+        '''
+        size = self.board.board_size
+        counts = self.line_counts[symbol]
+        self.filled_cells += 1
+        won = None
+        for line_idx in self.line_table.cell_lines[position]:
+            counts[line_idx] += 1
+            if won is None and counts[line_idx] == size:
+                won = line_idx
+        if won is not None:
+            self.winning_path = list(self.line_table.lines[won])
+            return symbol
+
+    def undo(self) -> tuple[int, int]:
+        '''
+        Take back the last move in O(1)
+
+        :raise: ValueError when there is no move to undo
+        :return: The position that was cleared
+        '''
+        if not self.history:
+            raise ValueError('There are no moves to undo')
+        record = self.history.pop()
+        position = record.position
+        player = self.players[record.player_idx]
+        self.board[position] = None
+        self.stones_hash ^= self.stone_key(position, player.symbol)
+        counts = self.line_counts[player.symbol]
+        for line_idx in self.line_table.cell_lines[position]:
+            counts[line_idx] -= 1
+        self.filled_cells -= 1
+        self.current_player_idx = record.player_idx
+        self.current_player = player
+        self.winner = record.winner
+        self.winning_path = record.winning_path
+        self.redo_stack.append(position)
+        return position
+
+    def redo(self) -> tuple[int, int]:
+        '''
+        Replay the last undone move
+
+        :raise: ValueError when there is no move to redo
+        '''
+        if not self.redo_stack:
+            raise ValueError('There are no moves to redo')
+        position = self.redo_stack.pop()
+        self.play_turn(position)
+        return position
+
+    def restore(self, moves: Sequence[tuple[int, int]], line_counts: dict[Symbol, list[int]], stones_hash: int,
+                stones: dict[Symbol, int] | None = None):
+        '''
+        Jump to the position after moves without replaying them one by one. line_counts, stones_hash and stones (bit
+        masks as in GameBoard.set_stones) must be the ones the game had after those moves (tic_tac_toe.archive keeps
+        them as checkpoints) and the moves must not have ended the game. Players must already be set. Without
+        stones the board is filled in move by move.
+        '''
+        self.initialize()
+        n_players = len(self.players)
+        if stones is not None:
+            self.board.set_stones(stones)
+        else:
+            for i, position in enumerate(moves):
+                self.board[position] = self.players[i % n_players].symbol
+        self.history = list(map(MoveRecord, moves, islice(cycle(range(n_players)), len(moves)), repeat(-1),
+                                repeat(None)))
+        self.line_counts = line_counts
+        self.stones_hash = stones_hash
+        self.filled_cells = len(moves)
+        self.current_player_idx = len(moves) % n_players
+        self.current_player = self.players[self.current_player_idx]
 
     def test_if_path_won(self, path: list[tuple[int,int]]):
-        board = self.board
-        if all_equal(board[x] for x in path):
-            symbol = board[path[0]]
-            if isinstance(symbol, Symbol):
-                return symbol
+        return path_winner(self.board, path)
 
-    def generate_paths(self) -> Generator[list[tuple[int, int]], None, None]:
+    def generate_paths(self) -> Generator[tuple[tuple[int, int], ...], None, None]:
         '''
+        Paths come from the shared LineTable for the board size and must not be modified
+
         :raise: ValueError when the game is stalemated
         :return:
         '''
-        board = self.board
-        size = board.board_size
-
-        for i in range(size):
-            yield list((i, j) for j in range(size))
-            yield list((j, i) for j in range(size))
-
-        #assuming the gameboard is square
-        yield list((i,i) for i in range(size))
-        yield list((i, (size-1)-i) for i in range(size))
+        yield from self.line_table.lines
 
     def evaluate_game_state(self) -> Symbol | None:
-        for path in self.generate_paths():
-            if (v:=self.test_if_path_won(path)) is not None:
-                self.winning_path = path
-                return v
+        if (found := self.board.find_win(self.generate_paths())) is not None:
+            symbol, path = found
+            self.winning_path = list(path)
+            return symbol
 
-        for val in self.board:
-            if val is None:
-                return
+        if not self.board.is_full():
+            return
 
         raise ValueError('Draw!')
 
@@ -244,23 +424,43 @@ class ConsoleTicTacToeGameView(TicTacToeGameView):
         self.current_player = player
 
 
+def create_player(name: str, symbol: Symbol, engine=None) -> Player:
+    if engine is None:
+        return Player(name, symbol)
+    return ComputerPlayer(name, symbol, engine)
+
+
 class ConsoleTicTacToeGameViewModel(TicTacToeGameViewModel):
-    def __init__(self, game: TicTacToeGame, view: ConsoleTicTacToeGameView):
+    def __init__(self, game: TicTacToeGame, view: ConsoleTicTacToeGameView, engines: Sequence = (),
+                 record_writer=None):
+        '''
+        :param engines: MoveEngine (or None for a human) for each player slot, missing slots are human
+        :param record_writer: tic_tac_toe.records.GameRecordWriter that finished games are logged to
+        '''
         super(ConsoleTicTacToeGameViewModel, self).__init__(game, view)
         self.view: ConsoleTicTacToeGameView = view
+        self.engines = engines
+        self.record_writer = record_writer
 
     def do_game_loop(self):
         assert 'init' == self.view.send_buffer.pop(0)
         self.view.recv_player_selection_state()
         players = self.view.send_buffer.pop(0)
-        self.game.set_players(tuple(Player(x, s) for x,s in zip(players, Symbol)))
+        engines = list(self.engines) + [None] * (len(players) - len(self.engines))
+        self.game.set_players(tuple(create_player(x, s, e) for x,s,e in zip(players, Symbol, engines)))
         self.view.recv_game_board_updated(self.game.board)
         while not self.game.is_game_over():
-            self.view.recv_player_turn_begin(self.game.current_player)
-            self.view.recv_move_inquery()
-            position = self.view.send_buffer.pop(0)
+            player = self.game.current_player
+            self.view.recv_player_turn_begin(player)
+            if player.is_computer():
+                position = player.engine.choose_move(self.game)
+            else:
+                self.view.recv_move_inquery()
+                position = self.view.send_buffer.pop(0)
             self.game.register_turn(position)
             self.view.recv_game_board_updated(self.game.board)
+        if self.record_writer is not None:
+            self.record_writer.write_game(self.game)
         if self.game.winner is None:
             self.view.recv_game_draw()
         else:
@@ -0,0 +1,99 @@
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from tic_tac_toe.lines import get_line_table
+from tic_tac_toe.model import GameBoard, Symbol
+
+EMPTY = 0
+SYMBOL_CODES: dict[Symbol, int] = {s: i + 1 for i, s in enumerate(Symbol)}
+CODE_SYMBOLS: tuple[Symbol | None, ...] = (None, *Symbol)
+
+
+class NumpyGameBoard(GameBoard):
+    '''
+    GameBoard stored as an int8 array (0 for empty, SYMBOL_CODES otherwise) indexed [column, row] like game_board.
+    Win and draw checks are whole board array reductions, which pay off on the large boards.
+    '''
+    def __init__(self, size: int):
+        # GameBoard.__init__ is not called because game_board is a read only view here
+        self.board_size = size
+        self.cells = np.zeros((size, size), dtype=np.int8)
+        self._columns: list[list] | None = None
+
+    @property
+    def game_board(self) -> list[list]:
+        if self._columns is None:
+            self._columns = [[CODE_SYMBOLS[code] for code in column] for column in self.cells.tolist()]
+        return self._columns
+
+    def initialize_game_board(self):
+        self.cells = np.zeros((self.board_size, self.board_size), dtype=np.int8)
+        self._columns = None
+
+    def clear(self):
+        self.initialize_game_board()
+
+    def __setitem__(self, key, value):
+        if type(key) is tuple:
+            self.cells[key] = EMPTY if value is None else SYMBOL_CODES[value]
+            self._columns = None
+        else:
+            raise NotImplementedError('Use a tuple to set an item on the GameBoard')
+
+    def __getitem__(self, item):
+        if type(item) is slice:
+            raise NotImplementedError('What are you doing dumbass?')
+        if type(item) is tuple:
+            return CODE_SYMBOLS[self.cells[item]]
+        else:
+            return self.game_board[item]
+
+    def set_stones(self, stones: dict[Symbol, int]):
+        n_cells = self.board_size * self.board_size
+        flat = self.cells.reshape(-1)
+        for symbol, mask in stones.items():
+            packed = np.frombuffer(mask.to_bytes((n_cells + 7) // 8, 'little'), dtype=np.uint8)
+            flat[np.unpackbits(packed, count=n_cells, bitorder='little').astype(bool)] = SYMBOL_CODES[symbol]
+        self._columns = None
+
+    def __iter__(self):
+        for code in self.cells.ravel().tolist():
+            yield CODE_SYMBOLS[code]
+
+    def won_lines(self, symbol: Symbol) -> np.ndarray:
+        '''
+        :return: bool array with one entry per path, in generate_paths order
+        '''
+        size = self.board_size
+        occupied = self.cells == SYMBOL_CODES[symbol]
+        won = np.empty(2 * size + 2, dtype=bool)
+        won[0:2 * size:2] = np.all(occupied, axis=1)
+        won[1:2 * size:2] = np.all(occupied, axis=0)
+        won[2 * size] = np.all(np.diagonal(occupied))
+        won[2 * size + 1] = np.all(np.diagonal(np.fliplr(occupied)))
+        return won
+
+    def has_won(self, symbol: Symbol) -> bool:
+        return bool(self.won_lines(symbol).any())
+
+    def find_win(self, paths: Iterable[Sequence[tuple[int, int]]] = ()) -> tuple[Symbol, list[tuple[int, int]]] | None:
+        '''
+        paths is ignored, the reductions cover the same lines in the same order
+        '''
+        best = None
+        for symbol in Symbol:
+            won = self.won_lines(symbol)
+            if won.any():
+                line_idx = int(np.argmax(won))
+                if best is None or line_idx < best[1]:
+                    best = (symbol, line_idx)
+        if best is not None:
+            symbol, line_idx = best
+            return symbol, list(get_line_table(self.board_size).lines[line_idx])
+
+    def is_full(self) -> bool:
+        return bool(np.all(self.cells != EMPTY))
+
+    def empty_cells(self) -> list[tuple[int, int]]:
+        return [tuple(position) for position in np.argwhere(self.cells == EMPTY).tolist()]
@@ -1,72 +1,75 @@
 from pathlib import Path
+from typing import Iterable
 
 from PySide6.QtCore import Signal, Property, QPropertyAnimation, QEasingCurve, QByteArray, QUrl, QVariantAnimation, \
-    QPoint, QPointF, QTimer
-from PySide6.QtGui import QImage, QPaintEvent, QPainter, Qt, QMouseEvent, QPen, QColor
+    QPoint, QPointF, QTimer, QSize, QSizeF, QRect, QRectF, QAbstractAnimation
+from PySide6.QtGui import QImage, QPaintEvent, QPainter, Qt, QMouseEvent, QPen, QColor, QPixmap, QResizeEvent, \
+    QWheelEvent, QKeyEvent
 from PySide6.QtMultimedia import QSoundEffect
-from PySide6.QtWidgets import QWidget, QGridLayout, QSizePolicy, QVBoxLayout, QHBoxLayout, QLabel, QColorDialog, QFrame
+from PySide6.QtWidgets import QApplication, QWidget, QSizePolicy, QVBoxLayout, QHBoxLayout, QLabel, QColorDialog, QFrame
 
-from tic_tac_toe.model import GameBoard
+from tic_tac_toe.model import GameBoard, Symbol, SYMBOL_INDEX
 from tic_tac_toe.qt_interface.model import QtPlayer, GameSettings
 
+ZOOM_HINT_BOARD_SIZE = 10  # Boards this big get told about zooming
 
-class FancyBoardTile(QWidget):
-    sig_clicked = Signal(QWidget, name='sig_clicked')
+
+class BoardTile:
+    '''
+    One cell of WidgetTicTacToe. Tiles are plain objects, the board widget draws them all and maps clicks to them.
+    '''
+    __slots__ = ('row', 'column', 'img', 'symbol', 'opacity')
 
     def __init__(self, row: int, column: int):
-        super(FancyBoardTile, self).__init__()
-        self.img: QImage | None = None
         self.row = row
         self.column = column
-        self.animation = None
-        self.opacity = 0
-
-    @Property(float)
-    def pix_opacity(self):
-        return self.opacity
-
-    @pix_opacity.setter
-    def pix_opacity(self, opacity: float):
-        self.opacity = opacity
-        self.repaint()
-
-    def set_image(self, img: QImage | None):
-        self.img = img
-        self.animation = QPropertyAnimation(self, QByteArray(b'pix_opacity'), self)
-        self.animation.setDuration(95)
-        self.animation.setStartValue(0)
-        self.animation.setEndValue(1)
-        self.animation.setEasingCurve(QEasingCurve.Type.InQuad)
-        self.animation.start()
-
-    def mouseReleaseEvent(self, event: QMouseEvent) -> None:
-        super(FancyBoardTile, self).mouseReleaseEvent(event)
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.sig_clicked.emit(self)
-
+        self.img: QImage | None = None
+        self.symbol: Symbol | None = None
+        self.opacity = 0.0
 
 
 class WidgetTicTacToe(QFrame):
+    '''
+    The board, zoomed out it fits the widget. The wheel zooms in around the cursor and dragging (left or middle
+    button) pans, + - and 0 do the same from the keyboard. Only tiles in view are painted, tiles too small to show a
+    symbol are painted as colored squares instead.
+    '''
     sig_grid_item_clicked = Signal(int, int, name='sig_grid_item_clicked')
     sig_game_end_animation_complete = Signal(name='sig_game_end_animation_complete')
 
+    SPACING = 6  # Widest the lines between tiles get, they thin out when tiles are small
+    FADE_IN_MS = 95
+    ZOOM_STEP = 1.25  # Per wheel notch
+    MAX_TILE_PIXELS = 96  # Zooming stops once tiles are this big
+    MIN_SYMBOL_PIXELS = 12  # Smaller tiles are painted as colored squares
+    MIN_LINE_PITCH = 4  # Below this the lines between tiles are left out
+    LOD_COLORS = ('#e4572e', '#17bebb', '#ffc914', '#76b041', '#a23b72', '#3b1f2b')
+
     def __init__(self, rows: int, cols: int, parent=None):
         super(WidgetTicTacToe, self).__init__(parent=parent)
         self.setObjectName('WidgetTicTacToe')
-        self.lbl_cmplx: list[list[FancyBoardTile]] = []
         self.rows = rows
         self.cols = cols
-        self.m_layout = QGridLayout()
-        self.set_layout_objs()
-        self.setLayout(self.m_layout)
-        self.m_layout.setContentsMargins(0,0,0,0)
-        self.m_layout.setSpacing(6)
+        self.lbl_cmplx: list[list[BoardTile]] = [[BoardTile(i, j) for j in range(cols)] for i in range(rows)]
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         self.board_color = QColor(Qt.GlobalColor.black)
         self.setProperty('class', 'ThemeProperties')
         self.sf = None
+        # The win line is kept in board units, (column, row) with tile centres at .5, so it follows zoom and pan
         self.drawing_point = None
         self.start_point = None
         self.game_win_line_color = QColor(Qt.GlobalColor.black)
+        # (image cacheKey, width, height) -> symbol scaled to fit a tile. The color is baked into the image so the
+        # key covers it, theme changes, resizes and zooming clear the cache.
+        self.scaled_images: dict[tuple[int, int, int], QPixmap] = {}
+        # Symbol -> square color when zoomed out, a player keeps its color whatever image it picked
+        self.lod_colors: dict[Symbol | None, QColor] = {}
+        self.zoom = 1.0
+        self.pan = QPointF(0, 0)  # Board top left relative to the top left of the contents
+        self.press_position: QPointF | None = None
+        self.press_pan = QPointF(0, 0)
+        self.panning = False
 
     @Property(QColor)
     def defaultBoardColor(self) -> QColor:
@@ -83,8 +86,13 @@ class WidgetTicTacToe(QFrame):
 
     @drawingPoint.setter
     def drawingPoint(self, point: QPointF):
+        previous = self.drawing_point if self.drawing_point is not None else self.start_point
         self.drawing_point = point
-        self.repaint()
+        if previous is None or point is None:
+            self.update()
+        else:
+            # Only the stretch the line grew by this tick
+            self.update(self.line_rect(previous, point))
 
     @Property(QColor)
     def gameWinLineColor(self) -> QColor:
@@ -95,11 +103,210 @@ class WidgetTicTacToe(QFrame):
         self.game_win_line_color = color
         self.repaint()
 
-    def fancy_board_tile_clicked(self, tile: FancyBoardTile):
-        self.sig_grid_item_clicked.emit(tile.row, tile.column)
+    def board_rect(self) -> QRectF:
+        '''
+        :return: Where the whole board is in widget coordinates, at zoom 1 that is the contents rect
+        '''
+        area = QRectF(self.contentsRect())
+        return QRectF(area.left() + self.pan.x(), area.top() + self.pan.y(), area.width() * self.zoom,
+                      area.height() * self.zoom)
+
+    def spacing(self) -> int:
+        board = self.board_rect()
+        tile = min(board.width() / self.cols, board.height() / self.rows)
+        return max(1, min(self.SPACING, int(tile / 8)))
+
+    def tile_pitch(self) -> tuple[float, float]:
+        '''
+        :return: (width, height) from the start of one tile to the start of the next, a tile plus the spacing
+        '''
+        board = self.board_rect()
+        spacing = self.spacing()
+        return (board.width() + spacing) / self.cols, (board.height() + spacing) / self.rows
+
+    def tile_rect(self, row: int, column: int) -> QRectF:
+        board = self.board_rect()
+        pitch_x, pitch_y = self.tile_pitch()
+        spacing = self.spacing()
+        return QRectF(board.left() + column * pitch_x, board.top() + row * pitch_y, pitch_x - spacing,
+                      pitch_y - spacing)
+
+    def board_point(self, point: QPointF) -> QPointF:
+        '''
+        :param point: In board units, (column, row)
+        :return: The point in widget coordinates
+        '''
+        board = self.board_rect()
+        pitch_x, pitch_y = self.tile_pitch()
+        spacing = self.spacing()
+        return QPointF(board.left() + point.x() * pitch_x - spacing / 2,
+                       board.top() + point.y() * pitch_y - spacing / 2)
+
+    def line_rect(self, start: QPointF, end: QPointF) -> QRect:
+        '''
+        :param start: In board units
+        :param end: In board units
+        :return: Widget area the win line between start and end covers, round caps included
+        '''
+        reach = self.spacing() * 2 + 1
+        rect = QRectF(self.board_point(start), self.board_point(end)).normalized()
+        return rect.adjusted(-reach, -reach, reach, reach).toAlignedRect()
+
+    def visible_tiles(self, rect: QRectF) -> tuple[range, range]:
+        '''
+        :return: (rows, columns) of the tiles that overlap rect
+        '''
+        board = self.board_rect()
+        pitch_x, pitch_y = self.tile_pitch()
+        rows = range(max(0, int((rect.top() - board.top()) // pitch_y)),
+                     min(self.rows, int((rect.bottom() - board.top()) // pitch_y) + 1))
+        columns = range(max(0, int((rect.left() - board.left()) // pitch_x)),
+                        min(self.cols, int((rect.right() - board.left()) // pitch_x) + 1))
+        return rows, columns
+
+    def tile_at(self, point: QPointF) -> BoardTile | None:
+        '''
+        :return: The tile under point, None on the lines between tiles or outside the board
+        '''
+        if not QRectF(self.contentsRect()).contains(point):
+            return None
+        board = self.board_rect()
+        pitch_x, pitch_y = self.tile_pitch()
+        spacing = self.spacing()
+        x = point.x() - board.left()
+        y = point.y() - board.top()
+        column = int(x // pitch_x)
+        row = int(y // pitch_y)
+        if not (0 <= row < self.rows and 0 <= column < self.cols):
+            return None
+        if x - column * pitch_x > pitch_x - spacing or y - row * pitch_y > pitch_y - spacing:
+            return None
+        return self.lbl_cmplx[row][column]
+
+    def max_zoom(self) -> float:
+        area = self.contentsRect()
+        if area.width() <= 0 or area.height() <= 0:
+            return 1.0
+        return max(1.0, self.MAX_TILE_PIXELS * max(self.cols / area.width(), self.rows / area.height()))
+
+    def set_view(self, zoom: float, pan: QPointF):
+        '''
+        Zoom and pan are clamped so the board always covers the whole widget
+        '''
+        area = self.contentsRect()
+        zoom = min(max(zoom, 1.0), self.max_zoom())
+        pan = QPointF(min(max(pan.x(), area.width() * (1 - zoom)), 0.0),
+                      min(max(pan.y(), area.height() * (1 - zoom)), 0.0))
+        if zoom != self.zoom:
+            self.scaled_images.clear()
+        self.zoom = zoom
+        self.pan = pan
+        self.update()
+
+    def zoom_at(self, anchor: QPointF, factor: float):
+        '''
+        Zoom by factor keeping the board under anchor where it is
+        '''
+        zoom = min(max(self.zoom * factor, 1.0), self.max_zoom())
+        offset = anchor - QPointF(self.contentsRect().topLeft())
+        self.set_view(zoom, offset - (offset - self.pan) * (zoom / self.zoom))
+
+    def reset_view(self):
+        self.set_view(1.0, QPointF(0, 0))
+
+    def scaled_image(self, img: QImage, size: QSize) -> QPixmap:
+        key = (img.cacheKey(), size.width(), size.height())
+        scaled = self.scaled_images.get(key)
+        if scaled is None:
+            scaled = QPixmap.fromImage(img.scaled(size, aspectMode=Qt.AspectRatioMode.KeepAspectRatio))
+            self.scaled_images[key] = scaled
+        return scaled
+
+    def lod_color(self, symbol: Symbol | None) -> QColor:
+        color = self.lod_colors.get(symbol)
+        if color is None:
+            index = len(self.LOD_COLORS) - 1 if symbol is None else SYMBOL_INDEX[symbol]
+            color = QColor(self.LOD_COLORS[index % len(self.LOD_COLORS)])
+            self.lod_colors[symbol] = color
+        return color
+
+    def invalidate_render_cache(self):
+        self.scaled_images.clear()
+        self.lod_colors.clear()
+        self.update()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super(WidgetTicTacToe, self).resizeEvent(event)
+        self.scaled_images.clear()
+        self.set_view(self.zoom, self.pan)
+
+    def wheelEvent(self, event: QWheelEvent) -> None:
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            super(WidgetTicTacToe, self).wheelEvent(event)
+            return
+        self.zoom_at(event.position(), self.ZOOM_STEP ** steps)
+        event.accept()
+
+    def keyPressEvent(self, event: QKeyEvent) -> None:
+        center = QRectF(self.contentsRect()).center()
+        if event.key() in (Qt.Key.Key_Plus, Qt.Key.Key_Equal):
+            self.zoom_at(center, self.ZOOM_STEP)
+        elif event.key() == Qt.Key.Key_Minus:
+            self.zoom_at(center, 1 / self.ZOOM_STEP)
+        elif event.key() == Qt.Key.Key_0:
+            self.reset_view()
+        else:
+            super(WidgetTicTacToe, self).keyPressEvent(event)
+
+    def mousePressEvent(self, event: QMouseEvent) -> None:
+        super(WidgetTicTacToe, self).mousePressEvent(event)
+        if event.button() in (Qt.MouseButton.LeftButton, Qt.MouseButton.MiddleButton):
+            self.press_position = event.position()
+            self.press_pan = QPointF(self.pan)
+            self.panning = event.button() == Qt.MouseButton.MiddleButton
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        super(WidgetTicTacToe, self).mouseMoveEvent(event)
+        if self.press_position is None:
+            return
+        moved = event.position() - self.press_position
+        # A left button drag only pans once it is clearly not a click
+        if not self.panning and self.zoom > 1 and moved.manhattanLength() >= QApplication.startDragDistance():
+            self.panning = True
+        if self.panning:
+            self.set_view(self.zoom, self.press_pan + moved)
 
-    def set_image_to_position(self, row: int, column: int, image: QImage):
-        self.lbl_cmplx[row][column].set_image(image)
+    def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+        super(WidgetTicTacToe, self).mouseReleaseEvent(event)
+        panned = self.panning
+        self.press_position = None
+        self.panning = False
+        if event.button() == Qt.MouseButton.LeftButton and not panned:
+            tile = self.tile_at(event.position())
+            if tile is not None:
+                self.sig_grid_item_clicked.emit(tile.row, tile.column)
+
+    def set_tile_opacity(self, tile: BoardTile, opacity: float):
+        tile.opacity = opacity
+        self.update(self.tile_rect(tile.row, tile.column).toAlignedRect())
+
+    def set_image_to_position(self, row: int, column: int, image: QImage, symbol: Symbol | None = None):
+        '''
+        :param symbol: Whose image it is, picks the tile's color when it is too small to show the image
+        '''
+        tile = self.lbl_cmplx[row][column]
+        tile.img = image
+        tile.symbol = symbol
+        tile.opacity = 0.0
+        # Owned by the board and deleted when done, so a full board does not keep one animation per tile around
+        animation = QVariantAnimation(self)
+        animation.setDuration(self.FADE_IN_MS)
+        animation.setStartValue(0.0)
+        animation.setEndValue(1.0)
+        animation.setEasingCurve(QEasingCurve.Type.InQuad)
+        animation.valueChanged.connect(lambda opacity: self.set_tile_opacity(tile, opacity))
+        animation.start(QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
         sf = QSoundEffect(parent=self)
         path = str(Path(__file__).resolve().parent / 'resources/sound_effects/bubble.wav')
         sf.setSource(QUrl.fromLocalFile(path))
@@ -107,51 +314,60 @@ class WidgetTicTacToe(QFrame):
         sf.play()
         self.sf = sf
 
-    def set_layout_objs(self):
-        for i in range(self.rows):
-            lbls = []
-            self.lbl_cmplx.append(lbls)
-            for j in range(self.cols):
-                lbl = FancyBoardTile(i, j)
-                lbl.sig_clicked.connect(self.fancy_board_tile_clicked)
-                lbl.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-                self.m_layout.addWidget(lbl, i, j)
-                lbls.append(lbl)
+    def clear_position(self, row: int, column: int):
+        tile = self.lbl_cmplx[row][column]
+        tile.img = None
+        tile.symbol = None
+        self.update(self.tile_rect(row, column).toAlignedRect())
 
     def paintEvent(self, event: QPaintEvent) -> None:
+        # Only what is both in view and in the dirty region gets painted, animations invalidate just their part
+        area = QRectF(self.contentsRect()).intersected(QRectF(event.rect()))
+        if area.isEmpty():
+            return
         painter = QPainter(self)
-        width = self.width()
-        height = self.height()
-
-        spacing = self.m_layout.spacing()
-        margins = self.contentsMargins()
+        board = self.board_rect()
+        spacing = self.spacing()
+        pitch_x, pitch_y = self.tile_pitch()
+        tile_width = pitch_x - spacing
+        tile_height = pitch_y - spacing
+        rows, columns = self.visible_tiles(area)
 
         try:
+            painter.setClipRect(area)
             pen = QPen(Qt.GlobalColor.black)
             pen.setWidth(spacing)
             pen.setColor(self.defaultBoardColor)
             painter.setPen(pen)
 
-            for ex_w in self.lbl_cmplx[0][:-1]:
-                x1 = ex_w.x() + ex_w.width()
-                x1 += int(spacing / 2)
-                painter.drawLine(x1, margins.top(), x1, height-margins.bottom())
-
-            for ex_w in list(x[0] for x in self.lbl_cmplx)[:-1]:
-                y1 = ex_w.y() + ex_w.height()
-                y1 += int(spacing/2)
-                painter.drawLine(margins.left(), y1, width-margins.right(), y1)
-
-
-            for lbls in self.lbl_cmplx:
-                for lbl in lbls:
-                    if lbl.img is None:
+            if min(pitch_x, pitch_y) >= self.MIN_LINE_PITCH:
+                for column in range(max(1, columns.start), min(self.cols, columns.stop + 1)):
+                    x1 = board.left() + column * pitch_x - spacing / 2
+                    painter.drawLine(QPointF(x1, area.top()), QPointF(x1, area.bottom()))
+
+                for row in range(max(1, rows.start), min(self.rows, rows.stop + 1)):
+                    y1 = board.top() + row * pitch_y - spacing / 2
+                    painter.drawLine(QPointF(area.left(), y1), QPointF(area.right(), y1))
+
+            detailed = min(tile_width, tile_height) >= self.MIN_SYMBOL_PIXELS
+            tile_size = QSizeF(tile_width, tile_height).toSize()
+            for row in rows:
+                tiles = self.lbl_cmplx[row]
+                y = board.top() + row * pitch_y
+                for column in columns:
+                    tile = tiles[column]
+                    if tile.img is None:
                         continue
-                    painter.setOpacity(max(0.0, lbl.opacity))
-                    img = lbl.img.scaled(lbl.size(), aspectMode=Qt.AspectRatioMode.KeepAspectRatio)
-                    side_x = lbl.width() - img.width()
-                    side_y = lbl.height() - img.height()
-                    painter.drawImage(lbl.x() + int(side_x / 2), lbl.y() + int(side_y / 2), img)
+                    x = board.left() + column * pitch_x
+                    painter.setOpacity(max(0.0, tile.opacity))
+                    if detailed:
+                        img = self.scaled_image(tile.img, tile_size)
+                        side_x = tile_width - img.width()
+                        side_y = tile_height - img.height()
+                        painter.drawPixmap(QPointF(x + side_x / 2, y + side_y / 2), img)
+                    else:
+                        painter.fillRect(QRectF(x, y, tile_width, tile_height), self.lod_color(tile.symbol))
+            painter.setOpacity(1.0)
 
             line_width = spacing * 4
             pen.setWidth(line_width)
@@ -161,34 +377,16 @@ class WidgetTicTacToe(QFrame):
 
             if self.start_point is not None:
                 vend_point:QPointF = self.drawingPoint
-                line_offset = QPointF(0, 0)
                 if vend_point is not None:
-                    painter.drawLine(self.start_point+line_offset, vend_point+line_offset)
+                    painter.drawLine(self.board_point(self.start_point), self.board_point(vend_point))
 
         finally:
             painter.end()
 
     def animate_game_win(self, path: list[tuple[int, int]]):
-        start_position = path[0]
-        end_position = path[-1]
-
-        margins = self.contentsMargins()
-
-        v_width = self.width() - (margins.left() + margins.right())
-        v_height = self.height() - (margins.top() + margins.bottom())
-
-        offset = QPointF((v_width / self.cols) / 2,  (v_height / self.rows) / 2)
-
-        start_x = (start_position[0] * v_width) / self.cols
-        start_y = (start_position[1] * v_height) / self.rows
-
-        end_x = (end_position[0] * v_width) / self.cols
-        end_y = (end_position[1] * v_height) / self.rows
-
-        start_point = QPointF(start_x, start_y) + offset
-        end_point = QPointF(end_x, end_y) + offset
-        start_point += QPointF(margins.left(), margins.top())
-        end_point += QPointF(margins.left(), margins.right())
+        # Positions are (x, y), column first, the line runs between tile centres
+        start_point = QPointF(path[0][0] + 0.5, path[0][1] + 0.5)
+        end_point = QPointF(path[-1][0] + 0.5, path[-1][1] + 0.5)
 
         self.start_point = start_point
 
@@ -257,7 +455,10 @@ class WidgetGameScreen(QWidget):
 
         self.m_layout = QVBoxLayout()
 
-        self.lbl_instrucitons = QLabel('Click the board to place your piece')
+        instructions = 'Click the board to place your piece'
+        if game_settings.game_size >= ZOOM_HINT_BOARD_SIZE:
+            instructions += ', scroll to zoom and drag to move around'
+        self.lbl_instrucitons = QLabel(instructions)
         self.lbl_instrucitons.setObjectName('lbl_instructions_game_screen')
         self.m_layout.addWidget(self.lbl_instrucitons)
         self.m_layout.addWidget(self.tic_tac_toe)
@@ -283,11 +484,16 @@ class WidgetGameScreen(QWidget):
         self.prompt.set_prompt(f'➤ {player.name}\'s turn')
         self.prompt.set_player_turn(player)
 
-    def update_game_board(self, board: GameBoard):
+    def update_game_board(self, board: GameBoard, positions: Iterable[tuple[int, int]]):
+        '''
+        :param positions: (column, row) of the cells that changed, the move played or the moves undone or redone
+        '''
         lbl_complx = self.tic_tac_toe.lbl_cmplx
-        for ic, colum in enumerate(board.game_board):
-            for ir, row_symb in enumerate(colum):
-                if row_symb is not None:
-                    image = self.game_settings.graphics[row_symb]
-                    if lbl_complx[ir][ic].img is not image:
-                        self.tic_tac_toe.set_image_to_position(ir, ic, image)
+        for ic, ir in positions:
+            row_symb = board[ic, ir]
+            if row_symb is not None:
+                image = self.game_settings.graphics[row_symb]
+                if lbl_complx[ir][ic].img is not image:
+                    self.tic_tac_toe.set_image_to_position(ir, ic, image, row_symb)
+            elif lbl_complx[ir][ic].img is not None:  # Undone
+                self.tic_tac_toe.clear_position(ir, ic)
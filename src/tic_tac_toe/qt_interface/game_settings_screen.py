@@ -5,7 +5,7 @@ from pathlib import Path
 from PySide6.QtCore import Signal, Property
 from PySide6.QtGui import QImage, QIcon, QPixmap, Qt, QColor
 from PySide6.QtWidgets import QWidget, QGridLayout, QLabel, QLineEdit, QPushButton, QSpinBox, QComboBox, QHBoxLayout, \
-    QColorDialog, QSpacerItem, QSizePolicy
+    QColorDialog, QSpacerItem, QSizePolicy, QCheckBox
 
 from tic_tac_toe.qt_interface.model import GameSettings, QtPlayer, GraphicsSymbol, colorize_pixmap
 
@@ -60,6 +60,7 @@ class WidgetGameSettingsScreen(QWidget):
         self.players = game_settings.players
         self.player_txt_boxes: list[QLineEdit] = []
         self.player_combo_boxes: list[QComboBox] = []
+        self.player_computer_boxes: list[QCheckBox] = []
         self.picture_wids = []
         self.color_wids = []
         self.color_picker_widgets = []
@@ -86,7 +87,11 @@ class WidgetGameSettingsScreen(QWidget):
             self.player_combo_boxes.append(cmb)
             self.picture_wids.append(wid_container)
             self.color_wids.append(picket_btn)
+            chk_computer = QCheckBox()
+            chk_computer.setChecked(player.is_computer())
+            self.player_computer_boxes.append(chk_computer)
             self.add_widgets(lbl, txt_box)
+            self.add_widgets(QLabel(f'Player {i+1} computer: '), chk_computer)
             self.add_widgets(QLabel(f'Player {i+1} symbol: '), wid_container)
             picket_btn.setFixedSize(30, cmb.sizeHint().height())
             picket_btn.setIcon(self.dropper_icon)
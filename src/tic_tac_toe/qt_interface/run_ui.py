@@ -1,21 +1,29 @@
 from pathlib import Path
 
-from PySide6.QtCore import QObject, Property, Signal
-from PySide6.QtGui import QPixmap, QColor, Qt, QFontDatabase, QPalette
+from PySide6.QtCore import QObject, Property, Signal, QTimer, QRunnable, QThreadPool
+from PySide6.QtGui import QPixmap, QColor, Qt, QFontDatabase, QPalette, QShortcut, QKeySequence
 from PySide6.QtWidgets import QApplication, QWidget, QLabel
 
-from tic_tac_toe.model import TicTacToeGame, GameBoard
+from tic_tac_toe.boards import create_game_board, ENGINE_BACKEND
+from tic_tac_toe.engines.base import MoveEngine
+from tic_tac_toe.engines.mcts import MCTSEngine
+from tic_tac_toe.engines.negamax import NegamaxEngine
+from tic_tac_toe.model import TicTacToeGame
 from tic_tac_toe.qt_interface.game_screen import WidgetGameScreen
 from tic_tac_toe.qt_interface.model import QtPlayer, GameSettings, GraphicsSymbol
 from tic_tac_toe.qt_interface.title_screen import TicTacToeTitleWidget
 from tic_tac_toe.qt_interface.game_settings_screen import WidgetGameSettingsScreen
 from tic_tac_toe.qt_interface.main_win import MainWin
 from tic_tac_toe.qt_interface.game_over_screen import TicTacToeGameOverWidget
+from tic_tac_toe.records import GameRecordWriter
 from pathlib import Path
 
 
 fp = Path(__file__).resolve().parent
 
+COMPUTER_MOVE_SECONDS = 1.0
+NEGAMAX_MAX_GAME_SIZE = 4  # Past this exhaustive search is hopeless, use MCTS
+
 
 class QssProperties(QWidget):
     sig_theme_updated = Signal(object, name='sig_theme_updated')
@@ -130,10 +138,38 @@ def set_up_app_theme(app: QApplication):
     app.setStyleSheet(APP_QSS)
 
 
+class EngineMoveSignals(QObject):
+    sig_move_chosen = Signal(int, object, name='sig_move_chosen')  # (request id, position)
+    sig_move_failed = Signal(int, str, name='sig_move_failed')  # (request id, error)
+
+
+class EngineMoveTask(QRunnable):
+    '''
+    Runs an engine's search on a pool thread so the window keeps painting, the move comes back on the GUI thread
+    through the signals. The game must not change until it does.
+    '''
+    def __init__(self, engine: MoveEngine, game: TicTacToeGame, request_id: int):
+        super(EngineMoveTask, self).__init__()
+        self.setAutoDelete(False)  # The view model holds on to it until the result is in
+        self.engine = engine
+        self.game = game
+        self.request_id = request_id
+        self.signals = EngineMoveSignals()
+
+    def run(self):
+        try:
+            position = self.engine.choose_move(self.game)
+        except Exception as e:
+            self.signals.sig_move_failed.emit(self.request_id, str(e))
+        else:
+            self.signals.sig_move_chosen.emit(self.request_id, position)
+
+
 class ViewModel(QObject):
-    def __init__(self):
+    def __init__(self, record_writer: GameRecordWriter | None = None):
         super(ViewModel, self).__init__()
         self.app = QApplication([])
+        self.record_writer = record_writer
 
 
         set_up_app_theme(self.app)
@@ -145,6 +181,9 @@ class ViewModel(QObject):
         self.game_settings: GameSettings = GameSettings()
 
         self.game: TicTacToeGame | None = None
+        # Running engine searches by request id, only the result for move_request is still wanted
+        self.engine_tasks: dict[int, EngineMoveTask] = {}
+        self.move_request = 0
         self.qss_props = QssProperties()
         self.qss_props.sig_theme_updated.connect(self.theme_updated)
         self.populate_symbol_images()
@@ -152,11 +191,15 @@ class ViewModel(QObject):
     def theme_updated(self, obj):
         for graphic in self.symbol_images.values():
             graphic.color = self.qss_props.defaultIconColor
+        if isinstance(getattr(self, 'screen', None), WidgetGameScreen):
+            self.screen.tic_tac_toe.invalidate_render_cache()
 
     def initialize_game(self):
-        self.game = TicTacToeGame(GameBoard(self.game_settings.game_size))
+        players = self.game_settings.players
+        backend = ENGINE_BACKEND if any(p.is_computer() for p in players) else None
+        self.game = TicTacToeGame(create_game_board(self.game_settings.game_size, backend))
         self.game.initialize()
-        self.game.set_players(self.game_settings.players)
+        self.game.set_players(players)
         self.game_settings.populate_graphics()
 
 
@@ -206,9 +249,13 @@ class ViewModel(QObject):
         # noinspection PyTypeChecker
         screen: WidgetGameSettingsScreen = self.screen
 
+        self.game_settings.game_size = screen.spin_game_size.value()
         for i, player in enumerate(screen.players):
             player.name = screen.player_txt_boxes[i].text()
-        self.game_settings.game_size = screen.spin_game_size.value()
+            if screen.player_computer_boxes[i].isChecked():
+                player.engine = self.create_engine(self.game_settings.game_size)
+            else:
+                player.engine = None
 
         screen.clear_error()
         if (p := self.validate_game_settings()) is not None:
@@ -216,7 +263,44 @@ class ViewModel(QObject):
         else:
             self.show_game_screen()
 
+    def create_engine(self, game_size: int) -> MoveEngine:
+        if game_size <= NEGAMAX_MAX_GAME_SIZE:
+            return NegamaxEngine(time_limit=COMPUTER_MOVE_SECONDS)
+        return MCTSEngine(time_limit=COMPUTER_MOVE_SECONDS)
+
     def game_screen_tile_clicked(self, row: int, col: int):
+        if self.game.current_player.is_computer():
+            return
+        self.play_move(row, col)
+
+    def computer_thinking(self) -> bool:
+        return self.move_request in self.engine_tasks
+
+    def play_computer_move(self):
+        if self.game is None or self.game.is_game_over() or self.computer_thinking():
+            return
+        self.move_request += 1
+        task = EngineMoveTask(self.game.current_player.engine, self.game, self.move_request)
+        task.signals.sig_move_chosen.connect(self.computer_move_chosen)
+        task.signals.sig_move_failed.connect(self.computer_move_failed)
+        self.engine_tasks[task.request_id] = task
+        QThreadPool.globalInstance().start(task)
+
+    def computer_move_chosen(self, request_id: int, position: tuple[int, int]):
+        self.engine_tasks.pop(request_id, None)
+        if request_id != self.move_request or self.game is None:
+            return
+        col, row = position
+        self.play_move(row, col)
+
+    def computer_move_failed(self, request_id: int, error: str):
+        self.engine_tasks.pop(request_id, None)
+        if request_id == self.move_request and self.game is not None:
+            # noinspection PyTypeChecker
+            screen: WidgetGameScreen = self.screen
+            screen.display_err(f'The computer could not move: {error}')
+
+    def play_move(self, row: int, col: int):
         # noinspection PyTypeChecker
         screen: WidgetGameScreen = self.screen
         screen.clear_err()
@@ -225,7 +309,7 @@ class ViewModel(QObject):
         except ValueError as e:
             screen.display_err(str(e))
         else:
-            screen.update_game_board(self.game.board)
+            screen.update_game_board(self.game.board, [(col, row)])
             self.game_loop()
 
     def game_loop(self):
@@ -234,7 +318,12 @@ class ViewModel(QObject):
         if self.game.winner == -1:
             player_turn = self.game.current_player
             screen.set_player_turn(player_turn)
+            if player_turn.is_computer():
+                # Let the screen show whose turn it is before the engine starts thinking
+                QTimer.singleShot(0, self.play_computer_move)
         else:
+            if self.record_writer is not None:
+                self.record_writer.write_game(self.game)
             try:
                 screen.tic_tac_toe.sig_grid_item_clicked.disconnect(self.game_screen_tile_clicked)
             except TypeError:
@@ -263,10 +352,43 @@ class ViewModel(QObject):
         self.initialize_game()
         screen = WidgetGameScreen(self.game_settings)
         screen.tic_tac_toe.sig_grid_item_clicked.connect(self.game_screen_tile_clicked)
+        QShortcut(QKeySequence(QKeySequence.StandardKey.Undo), screen, self.game_screen_undo)
+        QShortcut(QKeySequence(QKeySequence.StandardKey.Redo), screen, self.game_screen_redo)
         self.set_screen(screen)
         self.game_loop()
 
+    def game_screen_undo(self):
+        # Take back to the last human move so the computer does not immediately replay its own
+        if self.game is None or self.game.is_game_over() or self.computer_thinking():
+            return
+        try:
+            positions = [self.game.undo()]
+            while self.game.current_player.is_computer() and self.game.history:
+                positions.append(self.game.undo())
+        except ValueError:
+            return
+        self.game_screen_history_changed(positions)
+
+    def game_screen_redo(self):
+        if self.game is None or self.game.is_game_over() or self.computer_thinking():
+            return
+        try:
+            positions = [self.game.redo()]
+            while self.game.current_player.is_computer() and self.game.redo_stack:
+                positions.append(self.game.redo())
+        except ValueError:
+            return
+        self.game_screen_history_changed(positions)
+
+    def game_screen_history_changed(self, positions: list[tuple[int, int]]):
+        # noinspection PyTypeChecker
+        screen: WidgetGameScreen = self.screen
+        screen.clear_err()
+        screen.update_game_board(self.game.board, positions)
+        self.game_loop()
+
     def game_over_quit_requested(self):
+        self.move_request += 1  # Drop any move still being searched for
         self.game = None
         self.game_settings = GameSettings()
         self.show_title_screen()
@@ -286,9 +408,17 @@ class ViewModel(QObject):
         self.app.exec()
 
 
-def start_vm():
-    vm = ViewModel()
-    vm.run()
+def start_vm(record_path: Path | None = None):
+    '''
+    :param record_path: Game record file every finished game is appended to
+    '''
+    record_writer = None if record_path is None else GameRecordWriter(record_path)
+    vm = ViewModel(record_writer)
+    try:
+        vm.run()
+    finally:
+        if record_writer is not None:
+            record_writer.close()
 
 if __name__ == '__main__':
     start_vm()
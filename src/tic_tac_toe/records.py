@@ -0,0 +1,212 @@
+import struct
+from pathlib import Path
+from typing import BinaryIO, Generator
+
+from tic_tac_toe.model import TicTacToeGame, GameBoard, Player, Symbol, SYMBOL_INDEX
+
+# File layout: HEADER then records back to back. A record is a varint byte length followed by
+#   varint board size
+#   varint player count, then per player: varint name length, utf-8 name, one byte symbol index (Symbol order)
+#   varint move count, then one varint cell index (x * size + y) per move
+# Varints are unsigned LEB128, small boards need one byte per move.
+MAGIC = b'TTTR'
+VERSION = 1
+HEADER = struct.Struct('<4sB3x')
+SYMBOLS = tuple(Symbol)
+
+
+def encode_varint(value: int, out: bytearray):
+    if value < 0:
+        raise ValueError('Varints are unsigned')
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buf, offset: int) -> tuple[int, int]:
+    '''
+    :return: (value, offset just past the varint)
+    '''
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class GameRecord:
+    '''
+    A finished (or abandoned) game, enough to replay it move by move
+    '''
+    def __init__(self, size: int, players: list[tuple[str, Symbol]], moves: list[tuple[int, int]]):
+        self.size = size
+        self.players = players
+        self.moves = moves
+
+    @classmethod
+    def from_game(cls, game: TicTacToeGame) -> 'GameRecord':
+        return cls(game.board.board_size, [(p.name, p.symbol) for p in game.players],
+                   [record.position for record in game.history])
+
+    def replay(self, board: GameBoard | None = None, plies: int | None = None) -> TicTacToeGame:
+        '''
+        :param plies: Number of moves to play, None plays all of them
+        :return: A new game with the recorded moves played
+        '''
+        game = TicTacToeGame(board if board is not None else GameBoard(self.size))
+        game.initialize()
+        game.set_players([Player(name, symbol) for name, symbol in self.players])
+        for position in self.moves[:plies]:
+            game.register_turn(position)
+        return game
+
+    def encode(self) -> bytes:
+        '''
+        :return: The record with its length prefix
+        '''
+        body = self.encode_body()
+        out = bytearray()
+        encode_varint(len(body), out)
+        return bytes(out + body)
+
+    def encode_body(self) -> bytes:
+        body = bytearray()
+        encode_varint(self.size, body)
+        encode_varint(len(self.players), body)
+        for name, symbol in self.players:
+            name_bytes = name.encode('utf-8')
+            encode_varint(len(name_bytes), body)
+            body += name_bytes
+            body.append(SYMBOL_INDEX[symbol])
+        encode_varint(len(self.moves), body)
+        size = self.size
+        for x, y in self.moves:
+            encode_varint(x * size + y, body)
+        return bytes(body)
+
+    @classmethod
+    def decode(cls, buf, offset: int = 0, max_moves: int | None = None) -> 'GameRecord':
+        '''
+        :param buf: Record body without its length prefix, anything indexable by byte (bytes, memoryview, mmap)
+        :param max_moves: Stop after this many moves, the record then only holds the start of the game
+        '''
+        size, offset = decode_varint(buf, offset)
+        n_players, offset = decode_varint(buf, offset)
+        players = []
+        for _ in range(n_players):
+            length, offset = decode_varint(buf, offset)
+            name = bytes(buf[offset:offset + length]).decode('utf-8')
+            offset += length
+            players.append((name, SYMBOLS[buf[offset]]))
+            offset += 1
+        n_moves, offset = decode_varint(buf, offset)
+        if max_moves is not None:
+            n_moves = min(n_moves, max_moves)
+        moves = []
+        append = moves.append
+        for _ in range(n_moves):
+            # decode_varint inlined, this loop is most of the cost of reading a long game
+            cell = 0
+            shift = 0
+            while True:
+                byte = buf[offset]
+                offset += 1
+                cell |= (byte & 0x7f) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            append(divmod(cell, size))
+        return cls(size, players, moves)
+
+    def __eq__(self, other):
+        return (isinstance(other, GameRecord) and self.size == other.size and self.players == other.players
+                and self.moves == other.moves)
+
+    def __repr__(self):
+        return f'GameRecord(size={self.size}, players={self.players}, moves={len(self.moves)})'
+
+
+def read_header(f: BinaryIO, path):
+    header = f.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise ValueError(f'{path} is not a game record file')
+    magic, version = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} game record file')
+
+
+def read_stream_varint(f: BinaryIO) -> int | None:
+    '''
+    :return: The next varint in the stream, or None at a clean end of file
+    '''
+    value = 0
+    shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte:
+            if shift:
+                raise ValueError('Game record file is truncated')
+            return None
+        value |= (byte[0] & 0x7f) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def read_records(path: Path | str) -> Generator[GameRecord, None, None]:
+    '''
+    Stream records one at a time, only the record being decoded is held in memory
+    '''
+    with open(path, 'rb') as f:
+        read_header(f, path)
+        while (length := read_stream_varint(f)) is not None:
+            body = f.read(length)
+            if len(body) != length:
+                raise ValueError('Game record file is truncated')
+            yield GameRecord.decode(body)
+
+
+class GameRecordWriter:
+    '''
+    Appends records to a file, the header is written when the file is new. View models take one of these and log
+    every game that ends.
+    '''
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        if not new_file:
+            with open(self.path, 'rb') as f:
+                read_header(f, self.path)
+        self.file = open(self.path, 'ab')
+        if new_file:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+            self.file.flush()
+
+    def write(self, record: GameRecord) -> tuple[int, int]:
+        '''
+        :return: (file offset, length) of the record body
+        '''
+        body = record.encode_body()
+        prefix = bytearray()
+        encode_varint(len(body), prefix)
+        offset = self.file.tell() + len(prefix)
+        self.file.write(prefix + body)
+        self.file.flush()
+        return offset, len(body)
+
+    def write_game(self, game: TicTacToeGame) -> tuple[int, int]:
+        return self.write(GameRecord.from_game(game))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,101 @@
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+DRAW, FIRST_PLAYER, SECOND_PLAYER = 0, 1, 2
+DEFAULT_BATCH_SIZE = 100_000
+
+
+class SelfPlayResult:
+    '''
+    outcomes[i] is DRAW, FIRST_PLAYER or SECOND_PLAYER for game i and lengths[i] the number of moves it took
+    '''
+    def __init__(self, size: int, outcomes: np.ndarray, lengths: np.ndarray):
+        self.size = size
+        self.outcomes = outcomes
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def summary(self) -> dict[str, float]:
+        n_games = max(len(self), 1)
+        return {
+            'games': len(self),
+            'first_player_wins': float(np.count_nonzero(self.outcomes == FIRST_PLAYER)) / n_games,
+            'second_player_wins': float(np.count_nonzero(self.outcomes == SECOND_PLAYER)) / n_games,
+            'draws': float(np.count_nonzero(self.outcomes == DRAW)) / n_games,
+            'mean_length': float(self.lengths.mean()) if len(self) else 0.0,
+        }
+
+
+def simulate_batch(size: int, n_games: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Every game gets a uniformly random order of all cells up front, playing the cells in that order is the same as
+    picking a random legal move each turn. The games then advance in lockstep one ply at a time, only looking at the
+    row, column and diagonals through the cell just played.
+    '''
+    cells = size * size
+    order = np.argsort(rng.random((n_games, cells)), axis=1)
+    boards = np.zeros((n_games, size, size), dtype=np.int8)
+    outcomes = np.full(n_games, DRAW, dtype=np.int8)
+    lengths = np.full(n_games, cells, dtype=np.int16)
+    active = np.arange(n_games)
+    diag = np.arange(size)
+    anti = size - 1 - diag
+
+    for ply in range(cells):
+        code = FIRST_PLAYER if ply % 2 == 0 else SECOND_PLAYER
+        x, y = np.divmod(order[active, ply], size)
+        boards[active, x, y] = code
+        won = np.all(boards[active, x, :] == code, axis=1)
+        won |= np.all(boards[active, :, y] == code, axis=1)
+        # The diagonals are only gathered for the games whose move is on them
+        on_diag = np.flatnonzero(x == y)
+        won[on_diag] |= np.all(boards[active[on_diag, None], diag, diag] == code, axis=1)
+        on_anti = np.flatnonzero(x == anti[y])
+        won[on_anti] |= np.all(boards[active[on_anti, None], diag, anti] == code, axis=1)
+        finished = active[won]
+        outcomes[finished] = code
+        lengths[finished] = ply + 1
+        active = active[~won]
+        if len(active) == 0:
+            break
+    return outcomes, lengths
+
+
+def simulate_random_games(size: int, n_games: int, seed: int | None = None,
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> SelfPlayResult:
+    '''
+    Play n_games uniformly random games on a size x size board, the first player moves first in every game
+    '''
+    rng = np.random.default_rng(seed)
+    outcomes = np.empty(n_games, dtype=np.int8)
+    lengths = np.empty(n_games, dtype=np.int16)
+    # Keep the per batch arrays to a few tens of MB on the big boards
+    batch_size = max(1, min(batch_size, 4_000_000 // (size * size)))
+    for start in range(0, n_games, batch_size):
+        stop = min(start + batch_size, n_games)
+        outcomes[start:stop], lengths[start:stop] = simulate_batch(size, stop - start, rng)
+    return SelfPlayResult(size, outcomes, lengths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Random self play statistics')
+    parser.add_argument('--size', type=int, nargs='+', default=[3])
+    parser.add_argument('--games', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    for size in args.size:
+        start = perf_counter()
+        result = simulate_random_games(size, args.games, args.seed)
+        elapsed = perf_counter() - start
+        summary = result.summary()
+        print(f'{size}x{size}: ' + ', '.join(f'{k}={v:.4g}' for k, v in summary.items()) +
+              f', games_per_minute={len(result) / elapsed * 60:.3g}')
+
+
+if __name__ == '__main__':
+    main()
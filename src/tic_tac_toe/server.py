@@ -0,0 +1,502 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from tic_tac_toe.boards import create_game_board, ENGINE_BACKEND
+from tic_tac_toe.engines.base import MoveEngine, RandomEngine
+from tic_tac_toe.engines.mcts import MCTSEngine
+from tic_tac_toe.engines.negamax import NegamaxEngine
+from tic_tac_toe.engines.tablebase import TablebaseEngine
+from tic_tac_toe.model import TicTacToeGame, TicTacToeGameView, TicTacToeGameViewModel, GameBoard, Player, Symbol, \
+    create_player
+from tic_tac_toe.records import GameRecord
+from tic_tac_toe.tablebase import Tablebase
+
+# JSON lines protocol, one object per line both ways.
+# Requests: {"cmd": ..., "id": anything echoed back, ...arguments}
+#   create     size, name, players (default 2), opponent (optional computer player for the second seat: random,
+#              minimax[:depth], mcts[:milliseconds] or tablebase when the server was given one, see parse_opponent)
+#   join       session, name
+#   move       session, position [x, y]
+#   state      session
+#   subscribe  session
+# Responses: {"id": ..., "ok": true, ...} or {"id": ..., "ok": false, "error": message}
+# Events: {"event": ..., "session": ..., ...} pushed to every player and subscriber of a session
+DEFAULT_PORT = 8765
+MAX_PLAYERS = len(Symbol)
+MAX_BOARD_SIZE = 100  # As large as the UI goes, the game is built on the event loop
+MAX_BUFFERED_BYTES = 1 << 20  # Subscribers that fall this far behind are disconnected
+ENGINE_CACHE_SIZE = 64  # Computer players each engine worker keeps between moves
+ENGINE_SECONDS = 1.0  # Longest a minimax opponent thinks whatever depth it was asked for
+MAX_MINIMAX_DEPTH = 64
+DEFAULT_MCTS_MS = 1000
+MAX_MCTS_MS = 10_000
+
+
+class EngineSpec:
+    '''
+    A computer player as far as the server goes. Its engine is only ever built in an engine worker, from nothing but
+    these checked values.
+    '''
+    def __init__(self, kind: str, arg: int | None, seed: int, tablebase_path: str | None = None):
+        self.kind = kind
+        self.arg = arg
+        self.seed = seed
+        self.tablebase_path = tablebase_path
+
+    def create_engine(self) -> MoveEngine:
+        if self.kind == 'random':
+            return RandomEngine(self.seed)
+        if self.kind == 'minimax':
+            return NegamaxEngine(time_limit=ENGINE_SECONDS, max_depth=self.arg)
+        if self.kind == 'mcts':
+            return MCTSEngine(time_limit=(self.arg or DEFAULT_MCTS_MS) / 1000, seed=self.seed)
+        return TablebaseEngine(self.tablebase_path)
+
+
+def parse_opponent(spec: str) -> tuple[str, int | None]:
+    '''
+    Opponents are picked from a fixed list, the spec comes from the client: random, minimax[:depth],
+    mcts[:milliseconds] or tablebase, which plays from the server's own tablebase file
+
+    :raise: ValueError for anything else
+    :return: (kind, depth or milliseconds, None for the default)
+    '''
+    kind, sep, arg = spec.partition(':')
+    limits = {'minimax': MAX_MINIMAX_DEPTH, 'mcts': MAX_MCTS_MS}
+    if kind in ('random', 'tablebase') and not sep:
+        return kind, None
+    if kind not in limits:
+        raise ValueError(f'Unknown opponent {spec}, pick random, minimax[:depth], mcts[:milliseconds] or tablebase')
+    if not sep:
+        return kind, None
+    if not (arg.isascii() and arg.isdigit() and 1 <= int(arg) <= limits[kind]):
+        raise ValueError(f'{kind} takes a whole number between 1 and {limits[kind]}')
+    return kind, int(arg)
+
+
+_worker_engines: OrderedDict = OrderedDict()  # (session, seat) -> engine, in each engine worker process
+
+
+def choose_engine_move(key: tuple[str, int], spec: EngineSpec, record: GameRecord) -> tuple[int, int]:
+    '''
+    Runs in an engine worker. The game is replayed from its record, the engine is cached so that it keeps what it
+    learned on the moves this worker searched before.
+    '''
+    engine = _worker_engines.pop(key, None)
+    if engine is None:
+        engine = spec.create_engine()
+    _worker_engines[key] = engine
+    while len(_worker_engines) > ENGINE_CACHE_SIZE:
+        _worker_engines.popitem(last=False)
+    return engine.choose_move(record.replay(create_game_board(record.size, ENGINE_BACKEND)))
+
+
+def position_json(position: tuple[int, int]) -> list[int]:
+    return [position[0], position[1]]
+
+
+class RemoteGameView(TicTacToeGameView):
+    '''
+    A client connection as seen by one session. The recv_ calls turn into event lines for the client and the emit_
+    calls are the client's commands, they return the session's coroutine for the connection to await.
+    '''
+    def __init__(self, connection: 'ClientConnection', session: 'GameSession', player_idx: int | None = None):
+        self.connection = connection
+        self.session = session
+        self.player_idx = player_idx  # None for subscribers that only watch
+
+    def send(self, event: str, **data):
+        self.connection.send({'event': event, 'session': self.session.session_id, **data})
+
+    def emit_player_names_set(self, names: tuple[str, str]):
+        return self.session.join(self, names[0])
+
+    def emit_player_move_choice(self, choice: tuple[int, int]):
+        return self.session.play_move(self, choice)
+
+    def emit_initialized(self):
+        pass
+
+    def recv_game_won(self, winner: Player):
+        self.send('game_won', winner=winner.name, winning_path=[position_json(p) for p in
+                                                                 self.session.game.winning_path])
+
+    def recv_game_draw(self):
+        self.send('game_draw')
+
+    def recv_player_selection_state(self):
+        self.send('player_joined', players=self.session.seat_names())
+
+    def recv_game_begin_state(self):
+        self.send('game_begin', players=self.session.seat_names())
+
+    def recv_move_inquery(self):
+        if self.player_idx is not None and self.player_idx == self.session.game.current_player_idx:
+            self.send('move_inquiry')
+
+    def recv_game_board_updated(self, game_board: GameBoard, coordinate=None):
+        self.send('board_updated', position=position_json(coordinate), symbol=game_board[coordinate].value)
+
+    def recv_player_turn_begin(self, player: Player):
+        self.send('turn_begin', player=player.name, symbol=player.symbol.value)
+
+
+class BroadcastView(TicTacToeGameView):
+    '''
+    Fans every recv_ call out to all the views of a session
+    '''
+    def __init__(self):
+        self.views: list[RemoteGameView] = []
+
+    def emit_player_names_set(self, names: tuple[str, str]):
+        pass
+
+    def emit_player_move_choice(self, choice: tuple[int, int]):
+        pass
+
+    def emit_initialized(self):
+        pass
+
+    def recv_game_won(self, winner: Player):
+        for view in self.views:
+            view.recv_game_won(winner)
+
+    def recv_game_draw(self):
+        for view in self.views:
+            view.recv_game_draw()
+
+    def recv_player_selection_state(self):
+        for view in self.views:
+            view.recv_player_selection_state()
+
+    def recv_game_begin_state(self):
+        for view in self.views:
+            view.recv_game_begin_state()
+
+    def recv_move_inquery(self):
+        for view in self.views:
+            view.recv_move_inquery()
+
+    def recv_game_board_updated(self, game_board: GameBoard, coordinate=None):
+        for view in self.views:
+            view.recv_game_board_updated(game_board, coordinate)
+
+    def recv_player_turn_begin(self, player: Player):
+        for view in self.views:
+            view.recv_player_turn_begin(player)
+
+
+class GameSession(TicTacToeGameViewModel):
+    '''
+    One game and everyone connected to it. Everything runs on the server's event loop, the lock keeps commands of
+    one session from interleaving while a computer player thinks in the executor.
+    '''
+    def __init__(self, session_id: str, size: int, n_players: int = 2, record_writer=None,
+                 executor: ProcessPoolExecutor | None = None):
+        game = TicTacToeGame(create_game_board(size))
+        game.initialize()
+        super(GameSession, self).__init__(game, BroadcastView())
+        self.view: BroadcastView
+        self.session_id = session_id
+        self.lock = asyncio.Lock()
+        self.seats: list[Player | None] = [None] * n_players
+        self.record_writer = record_writer  # GameRecordWriter finished games are logged to
+        self.executor = executor  # Engine workers, needed as soon as a computer player takes a seat
+
+    def is_started(self) -> bool:
+        return bool(self.game.players)
+
+    def seat_names(self) -> list[str | None]:
+        return [None if p is None else p.name for p in self.seats]
+
+    def add_view(self, view: RemoteGameView):
+        self.view.views.append(view)
+
+    def remove_view(self, view: RemoteGameView):
+        if view in self.view.views:
+            self.view.views.remove(view)
+
+    def has_views(self) -> bool:
+        return bool(self.view.views)
+
+    async def join(self, view: RemoteGameView, name: str, engine: EngineSpec | None = None) -> int:
+        '''
+        :raise: ValueError when the game is full or the name is taken
+        :return: The seat taken
+        '''
+        async with self.lock:
+            if None not in self.seats:
+                raise ValueError('The game is full')
+            if name in self.seat_names():
+                raise ValueError(f'{name} is already playing')
+            if engine is None and view.player_idx is not None:
+                raise ValueError('You already have a seat in this game')
+            seat = self.seats.index(None)
+            self.seats[seat] = create_player(name, list(Symbol)[seat], engine)
+            if engine is None:
+                view.player_idx = seat
+            self.view.recv_player_selection_state()
+            if None not in self.seats:
+                self.game.set_players(self.seats)
+                self.view.recv_game_begin_state()
+                await self.next_turn()
+            return seat
+
+    async def play_move(self, view: RemoteGameView, position: tuple[int, int]):
+        '''
+        :raise: ValueError for moves out of turn or on taken squares
+        '''
+        async with self.lock:
+            if not self.is_started():
+                raise ValueError('The game has not started')
+            if view.player_idx is None or view.player_idx != self.game.current_player_idx:
+                raise ValueError('It is not your turn')
+            size = self.game.board.board_size
+            if not (0 <= position[0] < size and 0 <= position[1] < size):
+                raise ValueError(f'{position} is not on the board')
+            self.register(position)
+            await self.next_turn()
+
+    def register(self, position: tuple[int, int]):
+        self.game.register_turn(position)
+        self.view.recv_game_board_updated(self.game.board, position)
+        if self.game.is_game_over():
+            if self.record_writer is not None:
+                self.record_writer.write_game(self.game)
+            if self.game.winner is None:
+                self.view.recv_game_draw()
+            else:
+                self.view.recv_game_won(self.game.winner)
+
+    async def next_turn(self):
+        '''
+        Computer players move right away. Their search runs in the engine workers, the searches of all sessions
+        queue for them so that they neither hold the GIL the event loop needs nor pile up threads.
+        '''
+        loop = asyncio.get_running_loop()
+        while not self.game.is_game_over():
+            player = self.game.current_player
+            self.view.recv_player_turn_begin(player)
+            if not player.is_computer():
+                self.view.recv_move_inquery()
+                return
+            key = (self.session_id, self.game.current_player_idx)
+            self.register(await loop.run_in_executor(self.executor, choose_engine_move, key, player.engine,
+                                                     GameRecord.from_game(self.game)))
+
+    def state(self) -> dict[str, Any]:
+        game = self.game
+        if not self.is_started():
+            status = 'waiting'
+        elif not game.is_game_over():
+            status = 'playing'
+        else:
+            status = 'draw' if game.winner is None else 'won'
+        return {
+            'session': self.session_id,
+            'size': game.board.board_size,
+            'status': status,
+            'players': [None if p is None else {'name': p.name, 'symbol': p.symbol.value, 'computer': p.is_computer()}
+                        for p in self.seats],
+            'current_player': game.current_player_idx if status == 'playing' else None,
+            'winner': game.winner.name if status == 'won' else None,
+            'winning_path': [position_json(p) for p in game.winning_path] if status == 'won' else None,
+            'moves': [position_json(record.position) for record in game.history],
+        }
+
+
+class ClientConnection:
+    def __init__(self, server: 'GameServer', reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.views: dict[str, RemoteGameView] = {}
+        self.closed = False
+
+    def send(self, message: dict):
+        if self.closed:
+            return
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFERED_BYTES:
+            logging.info('Dropping a client that stopped reading')
+            self.close()
+
+    def close(self):
+        self.closed = True
+        self.writer.close()
+
+    def view(self, session: 'GameSession') -> RemoteGameView:
+        if session.session_id not in self.views:
+            view = RemoteGameView(self, session)
+            self.views[session.session_id] = view
+            session.add_view(view)
+        return self.views[session.session_id]
+
+    async def serve(self):
+        try:
+            while not self.closed and (line := await self.reader.readline()):
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('Requests are JSON objects')
+                    request_id = request.get('id')
+                    response = await self.server.dispatch(self, request)
+                    response.update(id=request_id, ok=True)
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {'id': request_id, 'ok': False, 'error': str(e) or type(e).__name__}
+                self.send(response)
+                if not self.closed:
+                    await self.writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.closed = True
+            for view in self.views.values():
+                self.server.leave(view)
+            self.views.clear()
+            self.writer.close()
+
+
+class GameServer:
+    '''
+    Hosts any number of sessions on one event loop, every client is another view of the sessions it is in
+    '''
+    def __init__(self, record_writer=None, engine_workers: int | None = None, tablebase_path: str | None = None):
+        '''
+        :param engine_workers: Processes computer players search in, None uses one per CPU
+        :param tablebase_path: Tablebase file the tablebase opponent plays from, None offers no such opponent
+        '''
+        self.sessions: dict[str, GameSession] = {}
+        self.session_ids = itertools.count(1)
+        self.record_writer = record_writer
+        self.engine_workers = engine_workers
+        self.executor: ProcessPoolExecutor | None = None
+        self.tablebase_path = tablebase_path
+        self.tablebase_size = None
+        if tablebase_path is not None:
+            tablebase = Tablebase(tablebase_path)
+            self.tablebase_size = tablebase.size
+            tablebase.close()
+
+    def engine_executor(self) -> ProcessPoolExecutor:
+        # Started on the first computer player, servers with only people playing never fork
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.engine_workers)
+        return self.executor
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def session(self, request: dict) -> GameSession:
+        session = self.sessions.get(str(request['session']))
+        if session is None:
+            raise ValueError(f'There is no session {request["session"]}')
+        return session
+
+    def leave(self, view: RemoteGameView):
+        session = view.session
+        session.remove_view(view)
+        if not session.has_views():
+            self.sessions.pop(session.session_id, None)
+
+    async def dispatch(self, connection: ClientConnection, request: dict) -> dict:
+        cmd = request['cmd']
+        if cmd == 'create':
+            return await self.create(connection, request)
+        if cmd == 'join':
+            session = self.session(request)
+            seat = await connection.view(session).emit_player_names_set((str(request['name']), ''))
+            return {'session': session.session_id, 'player': seat}
+        if cmd == 'move':
+            session = self.session(request)
+            x, y = request['position']
+            await connection.view(session).emit_player_move_choice((int(x), int(y)))
+            return {'session': session.session_id}
+        if cmd == 'state':
+            return {'state': self.session(request).state()}
+        if cmd == 'subscribe':
+            session = self.session(request)
+            connection.view(session)
+            return {'state': session.state()}
+        raise ValueError(f'Unknown command {cmd}')
+
+    async def create(self, connection: ClientConnection, request: dict) -> dict:
+        size = int(request.get('size', 3))
+        n_players = int(request.get('players', 2))
+        if not 1 <= size <= MAX_BOARD_SIZE:
+            raise ValueError(f'Board size must be between 1 and {MAX_BOARD_SIZE}')
+        if not 2 <= n_players <= MAX_PLAYERS:
+            raise ValueError(f'A game needs between 2 and {MAX_PLAYERS} players')
+        opponent = None
+        executor = None
+        if request.get('opponent'):
+            kind, arg = parse_opponent(str(request['opponent']))
+            if kind == 'tablebase' and self.tablebase_path is None:
+                raise ValueError('This server has no tablebase')
+            if kind == 'tablebase' and size != self.tablebase_size:
+                raise ValueError(f'The tablebase is for {self.tablebase_size}x{self.tablebase_size} boards')
+            opponent = EngineSpec(kind, arg, len(self.sessions), self.tablebase_path)
+            executor = self.engine_executor()
+        session_id = str(next(self.session_ids))
+        session = GameSession(session_id, size, n_players, self.record_writer, executor)
+        self.sessions[session_id] = session
+        view = connection.view(session)
+        seat = await session.join(view, str(request['name']))
+        if opponent is not None:
+            await session.join(view, str(request.get('opponent_name', request['opponent'])), opponent)
+        return {'session': session_id, 'player': seat, 'state': session.state()}
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await ClientConnection(self, reader, writer).serve()
+
+    async def serve_tcp(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_unix(self, path: str):
+        server = await asyncio.start_unix_server(self.handle_client, path)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Host tic tac toe games over a JSON lines protocol')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', default=None, help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--records', default=None, help='Game record file finished games are appended to')
+    parser.add_argument('--engine-workers', type=int, default=None,
+                        help='Processes computer players search in, one per CPU by default')
+    parser.add_argument('--tablebase', default=None, help='Tablebase file clients can play the tablebase opponent from')
+    args = parser.parse_args()
+
+    record_writer = None
+    if args.records is not None:
+        from tic_tac_toe.records import GameRecordWriter
+        record_writer = GameRecordWriter(args.records)
+    server = GameServer(record_writer, args.engine_workers, args.tablebase)
+    try:
+        if args.unix is not None:
+            asyncio.run(server.serve_unix(args.unix))
+        else:
+            asyncio.run(server.serve_tcp(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if record_writer is not None:
+            record_writer.close()
+
+
+if __name__ == '__main__':
+    main()
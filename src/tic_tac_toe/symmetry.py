@@ -0,0 +1,203 @@
+from functools import lru_cache
+
+from tic_tac_toe.engines.base import board_bits
+from tic_tac_toe.model import GameBoard, Symbol, mask_cells
+from tic_tac_toe.zobrist import zobrist_keys
+
+# The 8 symmetries of a square board as (x, y) -> (x', y') on a board of size n
+TRANSFORMS = (
+    ('identity', lambda x, y, n: (x, y)),
+    ('rotate_90', lambda x, y, n: (y, n - 1 - x)),
+    ('rotate_180', lambda x, y, n: (n - 1 - x, n - 1 - y)),
+    ('rotate_270', lambda x, y, n: (n - 1 - y, x)),
+    ('flip_x', lambda x, y, n: (n - 1 - x, y)),
+    ('flip_y', lambda x, y, n: (x, n - 1 - y)),
+    ('transpose', lambda x, y, n: (y, x)),
+    ('anti_transpose', lambda x, y, n: (n - 1 - y, n - 1 - x)),
+)
+
+
+@lru_cache(maxsize=16)
+def symmetry_permutations(size: int) -> tuple[tuple[int, ...], ...]:
+    '''
+    :return: perms[transform][cell] is the cell that cell maps to, cells are x * size + y
+    '''
+    perms = []
+    for _, transform in TRANSFORMS:
+        perm = [0] * (size * size)
+        for x in range(size):
+            for y in range(size):
+                tx, ty = transform(x, y, size)
+                perm[x * size + y] = tx * size + ty
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+
+@lru_cache(maxsize=16)
+def inverse_permutations(size: int) -> tuple[tuple[int, ...], ...]:
+    inverses = []
+    for perm in symmetry_permutations(size):
+        inverse = [0] * len(perm)
+        for cell, target in enumerate(perm):
+            inverse[target] = cell
+        inverses.append(tuple(inverse))
+    return tuple(inverses)
+
+
+CHUNK_BITS = 8
+# Byte tables take 8 * 256 entries per 8 cells, past this size they cost more to build and hold than permuting the
+# stones one by one
+MAX_TABLE_SYMMETRY_SIZE = 8
+
+
+def cells_mask(cells, n_cells: int) -> int:
+    buf = bytearray((n_cells + 7) // 8)
+    for cell in cells:
+        buf[cell >> 3] |= 1 << (cell & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def chunk_table(cells: int, start: int, cell_value) -> tuple[int, ...]:
+    '''
+    :return: For every byte value, the sum of cell_value(cell) over the cells start + bit whose bit is set
+    '''
+    width = min(CHUNK_BITS, cells - start)
+    table = []
+    for byte in range(1 << width):
+        value = 0
+        for bit in range(width):
+            if byte >> bit & 1:
+                value += cell_value(start + bit)
+        table.append(value)
+    return tuple(table)
+
+
+def apply_chunks(tables: tuple[tuple[int, ...], ...], mask: int) -> int:
+    value = 0
+    for i, table in enumerate(tables):
+        value += table[(mask >> (i * CHUNK_BITS)) & 0xff]
+    return value
+
+
+class BitSymmetry:
+    '''
+    Applies the 8 symmetries to bit mask positions (bit x * size + y per cell) through per byte lookup tables, so a
+    transform costs one lookup per 8 cells instead of one operation per cell. Only for boards up to
+    MAX_TABLE_SYMMETRY_SIZE, canonicalize_bits permutes the stones instead on bigger ones.
+
+    :raise: ValueError for boards bigger than MAX_TABLE_SYMMETRY_SIZE
+    '''
+    def __init__(self, size: int):
+        if size > MAX_TABLE_SYMMETRY_SIZE:
+            raise ValueError(f'Symmetry tables are only built up to {MAX_TABLE_SYMMETRY_SIZE}x{MAX_TABLE_SYMMETRY_SIZE}')
+        self.size = size
+        self.cells = size * size
+        chunks = range(0, self.cells, CHUNK_BITS)
+        self.tables = tuple(
+            tuple(chunk_table(self.cells, start, lambda cell, perm=perm: 1 << perm[cell]) for start in chunks)
+            for perm in symmetry_permutations(size)
+        )
+
+    def transform(self, mask: int, transform: int) -> int:
+        return apply_chunks(self.tables[transform], mask)
+
+    def canonical(self, masks: tuple[int, ...]) -> tuple[tuple[int, ...], int]:
+        '''
+        The canonical form is the transform giving the smallest masks[0] | masks[1] << cells | ...
+
+        :return: (canonical masks, index of the transform into TRANSFORMS)
+        '''
+        cells = self.cells
+        best = None
+        best_transform = 0
+        for i, tables in enumerate(self.tables):
+            key = 0
+            for j, mask in enumerate(masks):
+                key |= apply_chunks(tables, mask) << (j * cells)
+            if best is None or key < best:
+                best = key
+                best_transform = i
+        full = (1 << cells) - 1
+        return tuple((best >> (j * cells)) & full for j in range(len(masks))), best_transform
+
+
+@lru_cache(maxsize=16)
+def get_bit_symmetry(size: int) -> BitSymmetry:
+    return BitSymmetry(size)
+
+
+class CanonicalForm:
+    '''
+    masks holds one bit mask per symbol (Symbol order) in the canonical orientation, transform is the index into
+    TRANSFORMS that maps the original board onto it and hash is the Zobrist hash of the canonical stones
+    '''
+    __slots__ = ('size', 'masks', 'transform', 'hash')
+
+    def __init__(self, size: int, masks: tuple[int, ...], transform: int, hash: int):
+        self.size = size
+        self.masks = masks
+        self.transform = transform
+        self.hash = hash
+
+    @property
+    def transform_name(self) -> str:
+        return TRANSFORMS[self.transform][0]
+
+    def to_canonical(self, position: tuple[int, int]) -> tuple[int, int]:
+        cell = symmetry_permutations(self.size)[self.transform][position[0] * self.size + position[1]]
+        return divmod(cell, self.size)
+
+    def from_canonical(self, position: tuple[int, int]) -> tuple[int, int]:
+        cell = inverse_permutations(self.size)[self.transform][position[0] * self.size + position[1]]
+        return divmod(cell, self.size)
+
+    def __eq__(self, other):
+        return isinstance(other, CanonicalForm) and self.size == other.size and self.masks == other.masks
+
+    def __hash__(self):
+        return self.hash
+
+    def __repr__(self):
+        return f'CanonicalForm(size={self.size}, transform={self.transform_name}, hash={self.hash:#018x})'
+
+
+def canonical_stones(size: int, masks: tuple[int, ...]) -> tuple[tuple[list[int], ...], int]:
+    '''
+    Same choice as BitSymmetry.canonical, made by mapping only the occupied cells. Comparing the cells of each mask
+    highest first, last mask first, orders positions the same way as comparing the combined keys.
+
+    :return: (canonical cells per mask, index of the transform into TRANSFORMS)
+    '''
+    stones = [mask_cells(mask) for mask in reversed(masks)]
+    best = None
+    best_transform = 0
+    for i, perm in enumerate(symmetry_permutations(size)):
+        key = tuple(sorted((perm[cell] for cell in cells), reverse=True) for cells in stones)
+        if best is None or key < best:
+            best = key
+            best_transform = i
+    return tuple(reversed(best)), best_transform
+
+
+def canonicalize_bits(size: int, masks: tuple[int, ...]) -> CanonicalForm:
+    '''
+    Costs O(stones) per position, after the first call for a size has built its permutations
+    '''
+    stones, transform = canonical_stones(size, masks)
+    keys = zobrist_keys(size)
+    h = 0
+    for symbol_idx, cells in enumerate(stones):
+        symbol_keys = keys[symbol_idx]
+        for cell in cells:
+            h ^= symbol_keys[cell]
+    n_cells = size * size
+    return CanonicalForm(size, tuple(cells_mask(cells, n_cells) for cells in stones), transform, h)
+
+
+def canonicalize(board: GameBoard) -> CanonicalForm:
+    '''
+    Canonical form of a board under the 8 rotations and reflections, equivalent boards give equal forms and hashes.
+    Boards without bit masks are read cell by cell first, searches should keep masks and call canonicalize_bits.
+    '''
+    bits = board_bits(board)
+    return canonicalize_bits(board.board_size, tuple(bits[s] for s in Symbol))
@@ -0,0 +1,263 @@
+import argparse
+import mmap
+import struct
+from array import array
+from pathlib import Path
+
+from tic_tac_toe.engines.base import board_bits
+from tic_tac_toe.lines import get_line_table
+from tic_tac_toe.model import TicTacToeGame
+from tic_tac_toe.symmetry import get_bit_symmetry, chunk_table, apply_chunks, CHUNK_BITS
+
+# File layout: HEADER (with the number of positions n) then n KEYs in ascending order then n entry bytes, only for
+# the canonical positions reachable in a game. A key is the base 3 code of the canonical position, cell x * size + y
+# holds 0 for empty, 1 for the player who moved first and 2 for the other player, probes binary search the keys.
+# Entry bytes are outcome | distance << 2 where outcome is for the player to move and distance is the number of
+# plies to the end of the game with perfect play.
+MAGIC = b'TTTB'
+VERSION = 2
+HEADER = struct.Struct('<4sBB2xI')
+KEY = struct.Struct('<I')  # 3 ** 16 codes of a 4x4 board fit
+WIN, LOSS, DRAW = 1, 2, 3
+OUTCOME_NAMES = {WIN: 'win', LOSS: 'loss', DRAW: 'draw'}
+OPPONENT_OUTCOME = {WIN: LOSS, LOSS: WIN, DRAW: DRAW}
+OUTCOME_RANK = {WIN: 2, DRAW: 1, LOSS: 0}
+MAX_TABLEBASE_SIZE = 4
+
+
+class TablebaseEntry:
+    def __init__(self, outcome: int, distance: int):
+        self.outcome = outcome
+        self.distance = distance
+
+    @property
+    def outcome_name(self) -> str:
+        return OUTCOME_NAMES[self.outcome]
+
+    def __repr__(self):
+        return f'TablebaseEntry({self.outcome_name}, distance={self.distance})'
+
+
+class PositionCodec:
+    '''
+    Canonicalizes (first, second) bit mask positions under the 8 board symmetries and computes their entry index.
+    Transforms and base 3 codes are looked up a byte at a time so a position costs a few dozen table lookups.
+    '''
+    def __init__(self, size: int):
+        self.size = size
+        self.cells = size * size
+        self.symmetry = get_bit_symmetry(size)
+        self.base3 = tuple(chunk_table(self.cells, start, lambda cell: 3 ** cell)
+                           for start in range(0, self.cells, CHUNK_BITS))
+        self.line_masks = tuple(sum(1 << (x * size + y) for x, y in line) for line in get_line_table(size).lines)
+
+    def apply(self, tables: tuple[tuple[int, ...], ...], mask: int) -> int:
+        return apply_chunks(tables, mask)
+
+    def canonical(self, first: int, second: int) -> tuple[int, int]:
+        return self.symmetry.canonical((first, second))[0]
+
+    def index(self, first: int, second: int) -> int:
+        first, second = self.canonical(first, second)
+        return self.apply(self.base3, first) + 2 * self.apply(self.base3, second)
+
+    def has_line(self, stones: int) -> bool:
+        for mask in self.line_masks:
+            if stones & mask == mask:
+                return True
+        return False
+
+
+def generate_tablebase(size: int) -> tuple[array, bytes]:
+    '''
+    Retrograde analysis: every reachable canonical position is enumerated layer by layer (one layer per stone count),
+    then the layers are solved from the full board back to the empty one, so every child is solved before its parent.
+    Children are looked up in a table with a byte for every base 3 code while solving, only the reachable positions
+    are kept.
+
+    :return: (keys in ascending order as unsigned ints, their entries)
+    '''
+    if size > MAX_TABLEBASE_SIZE:
+        raise ValueError(f'Tablebases are only practical up to {MAX_TABLEBASE_SIZE}x{MAX_TABLEBASE_SIZE}')
+    codec = PositionCodec(size)
+    cells = codec.cells
+    full = (1 << cells) - 1
+
+    layers: list[set[int]] = [{0}]  # Keys are first | second << cells
+    for stones in range(cells):
+        next_layer = set()
+        for key in layers[stones]:
+            first, second = key & full, key >> cells
+            if codec.has_line(first) or codec.has_line(second):
+                continue  # Game already over
+            occupied = first | second
+            for cell in range(cells):
+                bit = 1 << cell
+                if occupied & bit:
+                    continue
+                if stones % 2 == 0:
+                    child = codec.canonical(first | bit, second)
+                else:
+                    child = codec.canonical(first, second | bit)
+                next_layer.add(child[0] | child[1] << cells)
+        layers.append(next_layer)
+
+    entries = bytearray(3 ** cells)
+    solved = array('I')
+    for stones in range(cells, -1, -1):
+        for key in layers[stones]:
+            first, second = key & full, key >> cells
+            index = codec.apply(codec.base3, first) + 2 * codec.apply(codec.base3, second)
+            solved.append(index)
+            if codec.has_line(first) or codec.has_line(second):
+                entries[index] = LOSS  # The player who just moved won
+                continue
+            if stones == cells:
+                entries[index] = DRAW
+                continue
+            entries[index] = solve_position(codec, entries, first, second, stones)
+        layers[stones] = set()
+    keys = array('I', sorted(solved))
+    return keys, bytes(map(entries.__getitem__, keys))
+
+
+def solve_position(codec: PositionCodec, entries: bytearray, first: int, second: int, stones: int) -> int:
+    '''
+    Winners take the shortest win, losers and drawn games take the longest line
+    '''
+    occupied = first | second
+    best_outcome = None
+    best_distance = 0
+    for cell in range(codec.cells):
+        bit = 1 << cell
+        if occupied & bit:
+            continue
+        if stones % 2 == 0:
+            child = entries[codec.index(first | bit, second)]
+        else:
+            child = entries[codec.index(first, second | bit)]
+        outcome = OPPONENT_OUTCOME[child & 3]
+        distance = (child >> 2) + 1
+        if best_outcome is None or OUTCOME_RANK[outcome] > OUTCOME_RANK[best_outcome]:
+            best_outcome, best_distance = outcome, distance
+        elif outcome == best_outcome:
+            if outcome == WIN:
+                best_distance = min(best_distance, distance)
+            else:
+                best_distance = max(best_distance, distance)
+    return best_outcome | (best_distance << 2)
+
+
+def write_tablebase(size: int, path: Path | str):
+    keys, entries = generate_tablebase(size)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, len(entries)))
+        f.write(struct.pack(f'<{len(keys)}I', *keys))
+        f.write(entries)
+
+
+class Tablebase:
+    '''
+    Read only view of a tablebase file. The file is memory mapped, so a probe only touches the pages its binary
+    search through the keys lands on and the one holding the entry.
+    '''
+    def __init__(self, path: Path | str):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {VERSION} tablebase, generate it again')
+        self.size = size
+        self.count = count
+        self.entries_offset = HEADER.size + count * KEY.size
+        self.codec = PositionCodec(size)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def game_position(self, game: TicTacToeGame) -> tuple[int, int, int]:
+        '''
+        :return: (first mover's stones, second mover's stones, stones on the board)
+        '''
+        if game.board.board_size != self.size:
+            raise ValueError(f'Tablebase is for {self.size}x{self.size} boards, not {game.board.board_size}')
+        bits = board_bits(game.board)
+        to_move = bits.pop(game.current_player.symbol)
+        other = 0
+        for b in bits.values():
+            other |= b
+        stones = (to_move | other).bit_count()
+        if stones % 2 == 0:
+            return to_move, other, stones
+        return other, to_move, stones
+
+    def find(self, index: int) -> int:
+        '''
+        :raise: KeyError when index is not one of the keys
+        :return: The entry number of the key
+        '''
+        unpack_from = KEY.unpack_from
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if unpack_from(self.map, HEADER.size + mid * KEY.size)[0] < index:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count or unpack_from(self.map, HEADER.size + lo * KEY.size)[0] != index:
+            raise KeyError('Position is not reachable in a game')
+        return lo
+
+    def probe_bits(self, first: int, second: int) -> TablebaseEntry:
+        entry = self.map[self.entries_offset + self.find(self.codec.index(first, second))]
+        return TablebaseEntry(entry & 3, entry >> 2)
+
+    def probe(self, game: TicTacToeGame) -> TablebaseEntry:
+        '''
+        :return: The outcome for the game's current player
+        '''
+        first, second, _ = self.game_position(game)
+        return self.probe_bits(first, second)
+
+    def best_move(self, game: TicTacToeGame) -> tuple[int, int]:
+        first, second, stones = self.game_position(game)
+        occupied = first | second
+        best = None
+        best_rank = None
+        for cell in range(self.codec.cells):
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            if stones % 2 == 0:
+                child_first, child_second = first | bit, second
+            else:
+                child_first, child_second = first, second | bit
+            child = self.probe_bits(child_first, child_second)
+            # The child's outcome is for the opponent, prefer the quickest loss for them, then the longest draw or win
+            outcome = OPPONENT_OUTCOME[child.outcome]
+            rank = (OUTCOME_RANK[outcome], -child.distance if outcome == WIN else child.distance)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = cell, rank
+        if best is None:
+            raise ValueError('There are no moves left on the board')
+        return divmod(best, self.size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a perfect play tablebase')
+    parser.add_argument('size', type=int)
+    parser.add_argument('path', type=Path)
+    args = parser.parse_args()
+    write_tablebase(args.size, args.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+from tic_tac_toe import instrumentation
+from tic_tac_toe.bitboard import BitGameBoard
+from tic_tac_toe.model import TicTacToeGame, GameBoard, Player, Symbol
+
+
+def new_game(board: GameBoard) -> TicTacToeGame:
+    game = TicTacToeGame(board)
+    game.initialize()
+    game.set_players([Player('a', Symbol.X), Player('b', Symbol.O)])
+    return game
+
+
+def test_evaluate_game_state_counts_the_path_scan():
+    find_win = GameBoard.find_win
+    game = new_game(GameBoard(5))
+    for position in [(0, 0), (1, 0), (0, 1), (1, 1), (2, 2)]:
+        game.register_turn(position)
+    with instrumentation.measure() as measurement:
+        assert game.evaluate_game_state() is None
+    stats = measurement.stats
+    assert stats['evaluate_game_state']['calls'] == 1
+    assert stats['find_win']['calls'] == 1
+    assert stats['paths_generated'] == len(game.line_table.lines)
+    assert stats['cells_scanned'] >= stats['paths_generated']
+    assert not instrumentation.is_enabled()
+    assert GameBoard.find_win is find_win
+
+
+def test_measure_one_game_leaves_others_alone():
+    game = new_game(GameBoard(3))
+    other = new_game(GameBoard(3))
+    with instrumentation.measure(game) as measurement:
+        for position in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+            game.register_turn(position)
+            other.register_turn(position)
+        game.evaluate_game_state()
+        other.evaluate_game_state()
+    stats = measurement.stats
+    assert stats['register_turn']['calls'] == 5
+    assert stats['lines_touched'] > 0
+    assert stats['find_win']['calls'] == 1
+    assert stats['cells_scanned'] > 0
+    assert 'find_win' not in vars(game.board)
+
+
+def test_bit_board_find_win_is_timed():
+    game = new_game(BitGameBoard(3))
+    for position in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+        game.register_turn(position)
+    with instrumentation.measure() as measurement:
+        assert game.evaluate_game_state() is Symbol.X
+    assert measurement.stats['find_win']['calls'] == 1
+    assert measurement.stats['cells_scanned'] == 0
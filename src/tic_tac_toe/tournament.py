@@ -0,0 +1,203 @@
+import argparse
+import csv
+import importlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator
+
+from tic_tac_toe.boards import create_game_board, ENGINE_BACKEND
+from tic_tac_toe.engines.base import MoveEngine, RandomEngine
+from tic_tac_toe.engines.mcts import MCTSEngine
+from tic_tac_toe.engines.negamax import NegamaxEngine
+from tic_tac_toe.model import TicTacToeGame, Player, Symbol, create_player
+
+RESULT_FIELDS = ('game_id', 'size', 'first', 'second', 'winner', 'moves', 'seconds')
+ELO_START = 1500.0
+ELO_K = 16.0
+
+
+def create_engine(spec: str, seed: int) -> MoveEngine | type[Player]:
+    '''
+    Player specs:
+        random
+        minimax[:seconds]
+        mcts[:seconds] or mcts:playouts=N
+        tablebase:path
+        package.module:Name where Name is a MoveEngine subclass (or factory) or a Player subclass taking (name, symbol)
+    '''
+    kind, _, arg = spec.partition(':')
+    if kind == 'random':
+        return RandomEngine(seed)
+    if kind == 'minimax':
+        return NegamaxEngine(time_limit=float(arg) if arg else 1.0)
+    if kind == 'mcts':
+        if arg.startswith('playouts='):
+            return MCTSEngine(time_limit=None, playouts=int(arg.partition('=')[2]), seed=seed)
+        return MCTSEngine(time_limit=float(arg) if arg else 1.0, seed=seed)
+    if kind == 'tablebase':
+        from tic_tac_toe.engines.tablebase import TablebaseEngine
+        return TablebaseEngine(arg)
+    if arg:
+        obj = getattr(importlib.import_module(kind), arg)
+        if isinstance(obj, type) and issubclass(obj, Player):
+            return obj
+        return obj()
+    raise ValueError(f'Unknown player spec {spec}')
+
+
+def make_player(spec: str, symbol: Symbol, seed: int) -> Player:
+    engine = create_engine(spec, seed)
+    if isinstance(engine, type):
+        player = engine(spec, symbol)
+        if not player.is_computer():
+            raise ValueError(f'{spec} is not a computer player')
+        return player
+    return create_player(spec, symbol, engine)
+
+
+def play_game(game_id: int, size: int, first: str, second: str, seed: int) -> dict:
+    '''
+    Worker entry point, plays one game between two player specs
+    '''
+    start = perf_counter()
+    game = TicTacToeGame(create_game_board(size, ENGINE_BACKEND))
+    game.initialize()
+    game.set_players([make_player(first, Symbol.X, seed), make_player(second, Symbol.O, seed + 1)])
+    moves = 0
+    while not game.is_game_over():
+        game.register_turn(game.current_player.engine.choose_move(game))
+        moves += 1
+    for player in game.players:
+        if hasattr(player.engine, 'close'):
+            player.engine.close()
+    return {
+        'game_id': game_id,
+        'size': size,
+        'first': first,
+        'second': second,
+        'winner': None if game.winner is None else game.winner.name,
+        'moves': moves,
+        'seconds': round(perf_counter() - start, 6),
+    }
+
+
+def schedule(specs: list[str], games_per_pairing: int) -> Iterator[tuple[str, str]]:
+    '''
+    Round robin, every ordered pair so each player gets both colors
+    '''
+    for _ in range(games_per_pairing):
+        yield from itertools.permutations(specs, 2)
+
+
+class EloRatings:
+    def __init__(self, k: float = ELO_K):
+        self.k = k
+        self.ratings: dict[str, float] = {}
+        self.games: dict[str, int] = {}
+
+    def expected(self, a: str, b: str) -> float:
+        return 1 / (1 + 10 ** ((self.rating(b) - self.rating(a)) / 400))
+
+    def rating(self, name: str) -> float:
+        return self.ratings.get(name, ELO_START)
+
+    def update(self, a: str, b: str, score_a: float):
+        expected_a = self.expected(a, b)
+        delta = self.k * (score_a - expected_a)
+        self.ratings[a] = self.rating(a) + delta
+        self.ratings[b] = self.rating(b) - delta
+        self.games[a] = self.games.get(a, 0) + 1
+        self.games[b] = self.games.get(b, 0) + 1
+
+    def record(self, result: dict):
+        if result['winner'] is None:
+            score = 0.5
+        else:
+            score = 1.0 if result['winner'] == result['first'] else 0.0
+        self.update(result['first'], result['second'], score)
+
+    def standings(self) -> list[tuple[str, float, int]]:
+        return sorted(((n, r, self.games[n]) for n, r in self.ratings.items()), key=lambda x: -x[1])
+
+
+class ResultWriter:
+    '''
+    Appends one line per finished game, .csv files get CSV and anything else JSON lines
+    '''
+    def __init__(self, path: Path):
+        self.path = path
+        self.is_csv = path.suffix.lower() == '.csv'
+        new_file = not path.exists() or path.stat().st_size == 0
+        self.file = open(path, 'a', newline='')
+        self.csv_writer = None
+        if self.is_csv:
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+            if new_file:
+                self.csv_writer.writeheader()
+
+    def write(self, result: dict):
+        if self.is_csv:
+            self.csv_writer.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run_tournament(specs: list[str], size: int, games_per_pairing: int, out: Path, workers: int | None = None,
+                   seed: int = 0) -> EloRatings:
+    '''
+    Only a couple of games per worker are in flight at any time, results are written and rated as they finish
+    so memory does not grow with the number of games
+    '''
+    workers = workers or os.cpu_count() or 1
+    ratings = EloRatings()
+    writer = ResultWriter(out)
+    pending = set()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for game_id, (first, second) in enumerate(schedule(specs, games_per_pairing)):
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        writer.write(result)
+                        ratings.record(result)
+                pending.add(executor.submit(play_game, game_id, size, first, second, seed + 2 * game_id))
+            for future in wait(pending).done:
+                result = future.result()
+                writer.write(result)
+                ratings.record(result)
+    finally:
+        writer.close()
+    return ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Round robin self play tournament')
+    parser.add_argument('--player', dest='players', action='append', required=True,
+                        help='Player spec, give at least two. ' + create_engine.__doc__.strip().replace('\n', ' '))
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--games', type=int, default=10, help='Games per ordered pairing')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=Path, default=Path('tournament.jsonl'), help='.csv or .jsonl results file')
+    args = parser.parse_args()
+    if len(args.players) < 2:
+        parser.error('A tournament needs at least two players')
+    if len(set(args.players)) != len(args.players):
+        parser.error('Player specs double as player names and must be unique')
+
+    ratings = run_tournament(args.players, args.size, args.games, args.out, args.workers, args.seed)
+    for name, rating, games in ratings.standings():
+        print(f'{rating:8.1f}  {games:6d}  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+import random
+from functools import lru_cache
+
+ZOBRIST_SEED = 0x7a6f62
+N_SYMBOLS = 2  # len(Symbol), not imported so tic_tac_toe.model can use these keys
+
+
+@lru_cache(maxsize=16)
+def zobrist_keys(size: int) -> tuple[tuple[int, ...], ...]:
+    '''
+    :return: keys[symbol_idx][cell] random 64 bit keys, cell is x * size + y and symbol_idx follows Symbol order
+    '''
+    rng = random.Random(ZOBRIST_SEED + size)
+    return tuple(tuple(rng.getrandbits(64) for _ in range(size * size)) for _ in range(N_SYMBOLS))
+
+
+@lru_cache(maxsize=16)
+def zobrist_side_keys(size: int) -> tuple[int, ...]:
+    '''
+    :return: One key per symbol for the player to move, the same stones with a different player to move are a
+             different position
+    '''
+    rng = random.Random(ZOBRIST_SEED - size)
+    return tuple(rng.getrandbits(64) for _ in range(N_SYMBOLS))
@@ -5,7 +5,10 @@
 @author: ☙ Ryan McConnell ❧
 """
 import asyncio
+from contextlib import contextmanager
 from enum import Enum
+from threading import Lock
+from time import perf_counter
 from types import NoneType
 from typing import Any, Callable
 
@@ -37,6 +40,8 @@ class ViewToVmCmd(Enum):
     GAME_RESET = 'emit_reset_game'
     GAME_RESTART = 'emit_game_restart'
 
+    SHUTDOWN = 'shutdown'  # Sentinel that stops the VM thread
+
 
 class SimpleMessage:
     def __init__(self, cmd: ViewToVmCmd, data: Any, end_callback: Callable | NoneType=None):
@@ -55,9 +60,91 @@ class SimpleMessage:
         return f'SimpleMessage(cmd={self.cmd}, data={self.data})'
 
 
+class DeliveryStats:
+    '''
+    Seconds from the VM posting a message to the app handling it
+    '''
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.batches = 0
+
+    def record(self, latency: float):
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            'messages': self.count,
+            'batches': self.batches,
+            'mean_latency': self.total / self.count if self.count else 0.0,
+            'max_latency': self.max,
+        }
+
+
+class VmToViewChannel:
+    '''
+    Hands messages from the VM thread to the app's event loop. Messages are queued and one delivery is scheduled on
+    the loop for whatever piled up, so a burst costs the app a single wakeup. Messages posted before the app binds
+    its loop are delivered once it does.
+    '''
+    def __init__(self, pump: MessagePump):
+        self.pump = pump
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.lock = Lock()
+        self.pending: list['VmToViewMessage'] = []
+        self.scheduled = False
+        self.holds = 0
+        self.stats = DeliveryStats()
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        with self.lock:
+            self.loop = loop
+        self.schedule()
+
+    def post(self, msg: 'VmToViewMessage'):
+        with self.lock:
+            self.pending.append(msg)
+        self.schedule()
+
+    @contextmanager
+    def hold(self):
+        '''
+        Messages posted inside are delivered together when the outermost hold ends
+        '''
+        with self.lock:
+            self.holds += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.holds -= 1
+            self.schedule()
+
+    def schedule(self):
+        with self.lock:
+            if self.scheduled or self.holds or not self.pending or self.loop is None:
+                return
+            self.scheduled = True
+            loop = self.loop
+        asyncio.run_coroutine_threadsafe(self.deliver(), loop)
+
+    async def deliver(self):
+        with self.lock:
+            batch = self.pending
+            self.pending = []
+            self.scheduled = False
+        if batch:
+            self.stats.batches += 1
+            await self.pump.post_message(VmToViewBatchMessage(batch, self.stats, self.pump))
+
+
 class TextualTicTacToeView(TicTacToeGameView):
     def __init__(self, message_pump: MessagePump):
         self.pump = message_pump
+        self.channel: VmToViewChannel = message_pump.vm_channel
 
     def emit_player_names_set(self, names: tuple[str, str]):
         pass
@@ -78,8 +165,10 @@ class TextualTicTacToeView(TicTacToeGameView):
         pass
 
     def post_message_to_app(self, cmd: VmToViewCmd, data: Any = None):
-        msg = VmToViewMessage(cmd, self.pump, data=data)
-        asyncio.run(self.pump.post_message(msg))
+        self.channel.post(VmToViewMessage(cmd, self.pump, data=data))
+
+    def batch(self):
+        return self.channel.hold()
 
     def recv_game_won(self, winner: str):
         self.post_message_to_app(VmToViewCmd.GAME_WON, data=winner)
@@ -108,15 +197,30 @@ class TextualTicTacToeView(TicTacToeGameView):
 
 
 class VmToViewMessage(Message):
-    __slots__ = 'cmd', 'data'
+    __slots__ = 'cmd', 'data', 'posted_at'
     namespace = 'recv_model_cmd'
 
     def __init__(self, cmd: VmToViewCmd, *args, data=None, **kwargs):
         super(VmToViewMessage, self).__init__(*args, **kwargs)
         self.cmd = cmd
         self.data = data
+        self.posted_at = perf_counter()
 
     def __rich_repr__(self):
         yield from super(VmToViewMessage, self).__rich_repr__()
         yield self.cmd
         yield self.data
+
+
+class VmToViewBatchMessage(Message):
+    __slots__ = 'messages', 'stats'
+    namespace = 'recv_model_cmd'
+
+    def __init__(self, messages: list[VmToViewMessage], stats: DeliveryStats, *args, **kwargs):
+        super(VmToViewBatchMessage, self).__init__(*args, **kwargs)
+        self.messages = messages
+        self.stats = stats
+
+    def __rich_repr__(self):
+        yield from super(VmToViewBatchMessage, self).__rich_repr__()
+        yield self.messages
@@ -1,10 +1,15 @@
 import logging
 
 from observer_hooks import notify
+from rich.segment import Segment
+from rich.style import Style
 from textual.app import ComposeResult
 from textual.events import Click
+from textual.geometry import Size, Region
 from textual.screen import Screen
-from textual.widgets import DataTable, Label, Header
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Label, Header
 
 from TeachChelsea.TickTacToe.model import Player, GameBoard, Symbol
 from TeachChelsea.TickTacToe.textual_interface.communication_interface import SimpleMessage, ViewToVmCmd, \
@@ -14,11 +19,63 @@ from pathlib import Path
 tp = Path(__file__).resolve().parent
 
 
+def symbol_text(s: Symbol | None) -> str:
+    if s is None:
+        return ' '
+    else:
+        return str(s.name)
+
+
+class TicTacToeBoardWidget(ScrollView):
+    '''
+    Draws the board straight from the GameBoard one line at a time, only the cells inside the viewport are ever
+    turned into segments so big boards cost what fits on screen
+    '''
+    CELL_WIDTH = 3
+    CELL_STYLES = (Style(bgcolor='#2b2f33'), Style(bgcolor='#3a3f45'))  # Checkerboard so cells stay distinguishable
+
+    def __init__(self, *args, **kwargs):
+        super(TicTacToeBoardWidget, self).__init__(*args, **kwargs)
+        self.board: GameBoard | None = None
+
+    def set_board(self, game_board: GameBoard):
+        self.board = game_board
+        size = game_board.board_size
+        self.virtual_size = Size(size * self.CELL_WIDTH, size)
+        self.refresh()
+
+    def refresh_cell(self, position: tuple[int, int]):
+        column, row = position
+        scroll_x, scroll_y = self.scroll_offset
+        self.refresh(Region(column * self.CELL_WIDTH - scroll_x, row - scroll_y, self.CELL_WIDTH, 1))
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        row = y + scroll_y
+        width = self.size.width
+        board = self.board
+        if board is None or row >= board.board_size:
+            return Strip.blank(width, self.rich_style)
+
+        cell_width = self.CELL_WIDTH
+        first_column = scroll_x // cell_width
+        last_column = min(board.board_size, (scroll_x + width) // cell_width + 1)
+        segments = []
+        for column in range(first_column, last_column):
+            style = self.CELL_STYLES[(row + column) % 2]
+            segments.append(Segment(symbol_text(board[column, row]).center(cell_width), style))
+        strip = Strip(segments, (last_column - first_column) * cell_width)
+        offset = scroll_x - first_column * cell_width
+        return strip.crop(offset, offset + width)
 
-class TicTacToeBoardTable(DataTable):
     def on_click(self, event: Click) -> None:
-        meta = event.style.meta
-        self.cell_clicked(meta["row"], meta["column"])
+        if self.board is None:
+            return
+        scroll_x, scroll_y = self.scroll_offset
+        column = (event.x + scroll_x) // self.CELL_WIDTH
+        row = event.y + scroll_y
+        if 0 <= column < self.board.board_size and 0 <= row < self.board.board_size:
+            self.cell_clicked(row, column)
 
     @notify(no_origin=True)
     def cell_clicked(self, row: int, column: int):
@@ -29,11 +86,12 @@ class TicTacToeScreen(Screen):
 
     def __init__(self, *args, **kwargs):
         super(TicTacToeScreen, self).__init__(*args, **kwargs)
-        self.wid_board = TicTacToeBoardTable(id='lbl_board', show_header=False)
+        self.wid_board = TicTacToeBoardWidget(id='lbl_board')
         self.wid_board.cell_clicked.subscribe(self.cell_clicked)
         self.lbl_prompt = Label('this is some text', id='lbl_prompt')
         self.current_player: None | Player = None
         self.picking_move = False
+        self.shown_board_size: int | None = None
 
     def cell_clicked(self, row: int, column: int):
         logging.debug(f'click row: {row}, col {column}')
@@ -48,25 +106,16 @@ class TicTacToeScreen(Screen):
         self.lbl_prompt.update(f'{player.name}, it\'s your turn!')
 
     def recv_game_board_updated(self, msg: VmToViewMessage):
-        # redraw the game board
+        # Only the cell at position changed, a position of None means the whole board may have (new game or reset)
         game_board: GameBoard = msg.data[0]
-        logging.debug(game_board)
-        position: tuple[int, int] = msg.data[1]
-
-        self.wid_board.clear()
-        self.wid_board.fixed_rows = game_board.board_size
-        self.wid_board.fixed_columns = game_board.board_size
-        self.wid_board.add_columns(*([''] * (game_board.board_size - len(self.wid_board.columns))))
-
-        def convert_symbol_to_str(s: Symbol):
-            if s is None:
-                return ' '
-            else:
-                return str(s.name)
+        position: tuple[int, int] | None = msg.data[1]
 
-        for i in range(game_board.board_size):
-            row = [convert_symbol_to_str(column[i]) for column in game_board.game_board]
-            self.wid_board.add_row(*row)
+        if position is None or self.shown_board_size != game_board.board_size:
+            logging.debug(game_board)
+            self.wid_board.set_board(game_board)
+            self.shown_board_size = game_board.board_size
+        else:
+            self.wid_board.refresh_cell(position)
 
     def recv_player_turn_begin(self, msg: VmToViewMessage):
         # Display whos turn it is
@@ -78,7 +127,6 @@ class TicTacToeScreen(Screen):
         yield Header()
         yield self.wid_board
         yield self.lbl_prompt
-        yield TicTacToeBoardTable()
 
 
     def on_mount(self):
@@ -25,7 +25,7 @@ def run_textual_game():
     try:
         app.run()
     finally:
-        thrd.pull_the_plug()
+        thrd.shutdown(timeout=1.0)
 
 
 run_textual_game()
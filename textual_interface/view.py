@@ -4,15 +4,17 @@
 
 @author: ☙ Ryan McConnell ❧
 """
+import asyncio
 import logging
 from queue import Queue
+from time import perf_counter
 
 from textual.app import ComposeResult, App
 from textual.screen import Screen
 from textual.widgets import Button, Header, Footer
 
 from TeachChelsea.TickTacToe.textual_interface.communication_interface import VmToViewCmd, ViewToVmCmd, SimpleMessage, \
-    VmToViewMessage
+    VmToViewMessage, VmToViewChannel, VmToViewBatchMessage
 from TeachChelsea.TickTacToe.textual_interface.game_over_screen import GameOverScreen
 from TeachChelsea.TickTacToe.textual_interface.game_screen import TicTacToeScreen
 from TeachChelsea.TickTacToe.textual_interface.player_select_screen import PlayerNameEntryScreen
@@ -29,6 +31,7 @@ class TicTacToeTextualizeApp(App):
     def __init__(self, *args, **kwargs):
         super(TicTacToeTextualizeApp, self).__init__(*args, **kwargs)
         self.queue = Queue()
+        self.vm_channel = VmToViewChannel(self)
         self.hack = []
         self.collect_all_css()
 
@@ -51,8 +54,11 @@ class TicTacToeTextualizeApp(App):
         # An action to toggle dark mode
         self.dark = not self.dark
 
-    def get_next_message(self, block=True) -> SimpleMessage:
-        return self.queue.get(block=block)
+    def get_next_message(self, block=True, timeout: float | None = None) -> SimpleMessage:
+        '''
+        :raise: queue.Empty when nothing arrived in time
+        '''
+        return self.queue.get(block=block, timeout=timeout)
 
     def pack_data_for_vm(self, sm: SimpleMessage):
         sm.end_callback = self.queue.task_done
@@ -122,10 +128,17 @@ class TicTacToeTextualizeApp(App):
             VmToViewCmd.SHUTDOWN: self.shutdown
         }[msg.cmd](msg)
 
+    def on_recv_model_cmd_vm_to_view_batch_message(self, batch: VmToViewBatchMessage):
+        for msg in batch.messages:
+            batch.stats.record(perf_counter() - msg.posted_at)
+            self.on_recv_model_cmd_vm_to_view_message(msg)
+
     def shutdown(self, msg: VmToViewMessage):
+        logging.debug(f'VM message delivery: {self.vm_channel.stats.snapshot()}')
         self.exit(0)
 
     def on_mount(self):
+        self.vm_channel.bind(asyncio.get_running_loop())
         self.push_screen(TitleScreen())
         for f in self.hack:
             f()
@@ -5,11 +5,10 @@
 @author: ☙ Ryan McConnell ❧
 """
 import logging
-from queue import Empty
 from threading import Thread
-from time import sleep
+from typing import Sequence
 
-from TeachChelsea.TickTacToe.model import TicTacToeGame, Player, Symbol
+from TeachChelsea.TickTacToe.model import TicTacToeGame, Symbol, create_player
 from TeachChelsea.TickTacToe.textual_interface.communication_interface import TextualTicTacToeView, SimpleMessage, \
     ViewToVmCmd
 
@@ -21,42 +20,57 @@ class GameLogicThread(Thread):
     STATE_GAME_INITIALIZE = 'game_initialize'
     STATE_AWAIT_PLAYER_MOVE = 'await_player_move'
     STATE_PLAYER_MOVE_INITIALIZE = 'player_move_initialize'
+    STATE_COMPUTER_MOVE = 'computer_move'
     STATE_GAME_OVER = 'game_over'
 
 
-    def __init__(self, game: TicTacToeGame, v: TextualTicTacToeView):
+    def __init__(self, game: TicTacToeGame, v: TextualTicTacToeView, engines: Sequence = (), record_writer=None):
         super(GameLogicThread, self).__init__()
         self.game = game
         self.view = v
-        self.live = True
+        self.engines = engines  # MoveEngine or None for each player slot, missing slots are human
+        self.record_writer = record_writer  # GameRecordWriter finished games are logged to
 
         self.game_state = self.GAME_STATE_INIT
+        self.transitions = 0  # Counts every set_game_state, a state can be left and entered again in one step
 
     def set_game_state(self, state: str):
         self.game_state = state
+        self.transitions += 1
 
     def do_player_names_choice(self, msg: SimpleMessage):
         logging.debug(f'recved player names {msg.data}')
-        self.game.set_players(tuple(Player(x,s) for x,s in zip(msg.data, Symbol)))
+        engines = list(self.engines) + [None] * (len(msg.data) - len(self.engines))
+        self.game.set_players(tuple(create_player(x,s,e) for x,s,e in zip(msg.data, Symbol, engines)))
         self.view.recv_game_begin_state()
 
     def do_game_screen_pushed(self, msg: SimpleMessage):
         self.set_game_state(self.STATE_GAME_INITIALIZE)
 
     def do_player_move_choice(self, msg: SimpleMessage):
-        if self.game_state == self.STATE_AWAIT_PLAYER_MOVE:
-            self.game.register_turn(msg.data)
-
-            if self.game.is_game_over():
-                if self.game.winner is None:
-                    self.view.recv_game_draw()
-                else:
-                    self.view.recv_game_won(self.game.winner.name)
-                self.set_game_state(self.STATE_GAME_OVER)
+        if self.game_state == self.STATE_AWAIT_PLAYER_MOVE and not self.game.current_player.is_computer():
+            try:
+                self.play_move(msg.data)
+            except ValueError as e:  # A taken square, the same player is asked again
+                logging.debug(f'Ignoring move {msg.data}: {e}')
+                self.view.recv_move_inquery()
+        else:
+            # A click that came in while it was nobody's turn to click, the game goes on
+            logging.debug(f'Ignoring move {msg.data} in state {self.game_state}')
+
+    def play_move(self, position: tuple[int, int]):
+        self.game.register_turn(position)
+
+        if self.game.is_game_over():
+            if self.record_writer is not None:
+                self.record_writer.write_game(self.game)
+            if self.game.winner is None:
+                self.view.recv_game_draw()
             else:
-                self.set_game_state(self.STATE_PLAYER_MOVE_INITIALIZE)
-        else: # PANIC
-            raise ValueError()
+                self.view.recv_game_won(self.game.winner.name)
+            self.set_game_state(self.STATE_GAME_OVER)
+        else:
+            self.set_game_state(self.STATE_PLAYER_MOVE_INITIALIZE)
 
     def do_game_started(self, msg: SimpleMessage):
         self.set_game_state(self.STATE_GAME_START)
@@ -75,10 +89,20 @@ class GameLogicThread(Thread):
         self.game.initialize()
 
     def game_state_player_move(self):
-        self.view.recv_game_board_updated(self.game.board, coordinate=None)
-        self.view.recv_player_turn_begin(self.game.current_player)
-        self.set_game_state(self.STATE_AWAIT_PLAYER_MOVE)
-        self.view.recv_move_inquery()
+        # The view redraws only the last move's cell, or the whole board when nothing was played yet
+        last_move = self.game.history[-1].position if self.game.history else None
+        self.view.recv_game_board_updated(self.game.board, coordinate=last_move)
+        player = self.game.current_player
+        self.view.recv_player_turn_begin(player)
+        if player.is_computer():
+            # Searched in a step of its own, the board and whose turn it is reach the view before the engine thinks
+            self.set_game_state(self.STATE_COMPUTER_MOVE)
+        else:
+            self.set_game_state(self.STATE_AWAIT_PLAYER_MOVE)
+            self.view.recv_move_inquery()
+
+    def game_state_computer_move(self):
+        self.play_move(self.game.current_player.engine.choose_move(self.game))
 
     def game_state_over(self):
         pass
@@ -88,37 +112,54 @@ class GameLogicThread(Thread):
             self.STATE_GAME_START: [self.game_state_game_start],
             self.STATE_GAME_INITIALIZE: [self.game_state_game_initialize, self.game_state_player_move],
             self.STATE_PLAYER_MOVE_INITIALIZE: [self.game_state_player_move],
+            self.STATE_COMPUTER_MOVE: [self.game_state_computer_move],
             self.STATE_GAME_OVER: [self.game_state_over]
         }
         if self.game_state in state_actions:
             for action in state_actions[self.game_state]:
                 action()
 
+    def advance(self):
+        # Run the state machine until it settles, after that only a message from the view can change anything. A
+        # computer's reply goes from PLAYER_MOVE_INITIALIZE back to it, so it is the transitions that are compared.
+        # What the view is told in one step reaches it in one batch as soon as the step is done.
+        while True:
+            transitions = self.transitions
+            with self.view.batch():
+                self.game_loop()
+            if self.transitions == transitions:
+                break
+
     def run(self) -> None:
+        handlers = {
+            ViewToVmCmd.PLAYER_NAMES_CHOICE: self.do_player_names_choice,
+            ViewToVmCmd.GAME_SCREEN_PUSHED: self.do_game_screen_pushed,
+            ViewToVmCmd.PLAYER_MOVE_CHOICE: self.do_player_move_choice,
+            ViewToVmCmd.GAME_STARTED: self.do_game_started,
+            ViewToVmCmd.GAME_RESET: self.do_game_reset,
+            ViewToVmCmd.GAME_RESTART: self.do_game_restart
+        }
         try:
-            while self.live:
-                sleepy = False
-                try:
-                    with self.view.pump.get_next_message(block=False) as msg:
-                        logging.debug(f'VM Thread recv: {msg}')
-                        {
-                            ViewToVmCmd.PLAYER_NAMES_CHOICE: self.do_player_names_choice,
-                            ViewToVmCmd.GAME_SCREEN_PUSHED: self.do_game_screen_pushed,
-                            ViewToVmCmd.PLAYER_MOVE_CHOICE: self.do_player_move_choice,
-                            ViewToVmCmd.GAME_STARTED: self.do_game_started,
-                            ViewToVmCmd.GAME_RESET: self.do_game_reset,
-                            ViewToVmCmd.GAME_RESTART: self.do_game_restart
-                        }[msg.cmd](msg)
-                except Empty:
-                    sleepy = True
-
-                self.game_loop()
-                if sleepy:
-                    sleep(0.1)
+            self.advance()
+            while True:
+                # Blocks without waking up until the view sends something, shutdown() sends a sentinel
+                with self.view.pump.get_next_message() as msg:
+                    logging.debug(f'VM Thread recv: {msg}')
+                    if msg.cmd == ViewToVmCmd.SHUTDOWN:
+                        break
+                    # Everything the view is told while handling one message reaches it in one batch
+                    with self.view.batch():
+                        handlers[msg.cmd](msg)
+                    self.advance()
         except Exception as e:
             logging.debug(f'VM EXCEPTION: {e}')
 
         logging.debug('VM event loop terminating')
 
-    def pull_the_plug(self):
-        self.live = False
+    def shutdown(self, timeout: float | None = None):
+        '''
+        Stop the thread once it is done with the message in hand and wait for it
+        '''
+        self.view.pump.pack_data_for_vm(SimpleMessage(ViewToVmCmd.SHUTDOWN, None))
+        if self.is_alive():
+            self.join(timeout)